@@ -0,0 +1,68 @@
+import csv
+import os
+from constants import StatsColumns
+from FilePathManager import FilePathManager
+
+class AnswerJournal:
+    """
+    Append-only journal of answers given in one learning set.
+
+    Every answer is written as one small record holding the new statistics of the answered row,
+    so the set file does not have to be rewritten after each answer. Pending records are replayed
+    by load_set and folded back into the set file by save_set.
+    """
+    SUFFIX = ".journal"
+    COLUMNS = [
+        StatsColumns.CORRECT_ANSWERS.value,
+        StatsColumns.GOOD_ANSWERS_IN_A_ROW.value,
+        StatsColumns.GOOD_ANSWER.value,
+        StatsColumns.WORD_TO_LEARN.value
+    ]
+
+    def __init__(self, file_name: str):
+        self.path = FilePathManager.get_csv_path(file_name) + self.SUFFIX
+
+    def append(self, index: int, row) -> int:
+        """Appends the statistics of the row to the journal and returns the size of the journal in bytes."""
+        record = [int(index), int(row[StatsColumns.CORRECT_ANSWERS.value])]
+        record.extend(int(bool(row[col])) for col in self.COLUMNS[1:])
+
+        with open(self.path, "a", newline="") as f:
+            csv.writer(f).writerow(record)
+            return f.tell()
+
+    def entries(self) -> list:
+        """Returns the list of (index, values) pairs stored in the journal."""
+        if not os.path.exists(self.path):
+            return []
+
+        entries = []
+        with open(self.path, "r", newline="") as f:
+            for record in csv.reader(f):
+                # skip records that were not written completely (e.g. the app was killed while writing)
+                if len(record) != len(self.COLUMNS) + 1:
+                    continue
+                try:
+                    index, correct_answers, *flags = (int(value) for value in record)
+                except ValueError:
+                    continue
+                values = {StatsColumns.CORRECT_ANSWERS.value: correct_answers}
+                values.update({col: bool(flag) for col, flag in zip(self.COLUMNS[1:], flags)})
+                entries.append((index, values))
+        return entries
+
+    def has_records(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def replay(self, data):
+        """Applies pending entries to the DataFrame with the set. Later entries overwrite earlier ones."""
+        for index, values in self.entries():
+            if index not in data.index:
+                continue # the row was deleted after the answer was given
+            for col, value in values.items():
+                data.at[index, col] = value
+        return data
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
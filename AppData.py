@@ -1,8 +1,14 @@
+import numpy as np
 import pandas as pd
 import random as rd
-import os
+import atexit
+import weakref
+from datetime import datetime
 from constants import FilesColumns, StatsColumns, PartsOfSpeech, WordDefinitions
 from FilePathManager import FilePathManager
+from StorageBackend import StorageBackend
+from IndexBucket import IndexBucket
+from StateCode import StateCode
 
 def get_kind_of_file_and_validate(file_name: str) -> str:
     # Returns the kind of file and validates it.
@@ -13,15 +19,28 @@ def get_kind_of_file_and_validate(file_name: str) -> str:
     else:
         raise Exception("The file_name must end with _words.csv or _definitions.csv.")
 
+def compute_set_summary(data, file_name: str) -> dict:
+    # Returns the summary of the set kept in the registry, it is shown on tiles of the main menu.
+    codes_count = np.bincount(StateCode.from_data(data).to_numpy(), minlength=8)
+    
+    rows = len(data)
+    known = int(codes_count[StateCode.KNOWN]) # 1/1/0
+    to_learn = int(codes_count[StateCode.UNVERIFIED]) # 0/0/0
+    return {
+        FilesColumns.KIND.value: get_kind_of_file_and_validate(file_name),
+        FilesColumns.ROWS.value: rows,
+        FilesColumns.KNOWN.value: known,
+        FilesColumns.LEARNING.value: rows - known - to_learn,
+        FilesColumns.TO_LEARN.value: to_learn
+    }
+
 def save_set(data, file_name):
-    # Use FilePathManager to get the correct file path
-    full_path = FilePathManager.get_csv_path(file_name)
-    data.to_csv(full_path, index=True)
+    storage = StorageBackend.get_active()
+    storage.save_set(data, file_name)
+    storage.update_set_summary(file_name, compute_set_summary(data, file_name))
 
 def load_set(file_name):
-    # Use FilePathManager to get the correct file path
-    full_path = FilePathManager.get_csv_path(file_name)
-    return pd.read_csv(full_path, index_col=0)
+    return StorageBackend.get_active().load_set(file_name)
 
 def sanitize_file_name(file_name: str, kind: str) -> str:
     # deletes special characters that are not allowed in the file name
@@ -31,46 +50,34 @@ def sanitize_file_name(file_name: str, kind: str) -> str:
     return file_name
 
 def get_file_names_and_titles() -> dict:
-    # Use FilePathManager for the path to files.csv
-    files_data_path = FilePathManager.get_files_data_path()
-    
-    if not os.path.exists(files_data_path):
-        generate_empty_files_data()
-    
-    df_files = pd.read_csv(files_data_path)
-    # change nan to empty string
-    df_files[FilesColumns.SUBTITLE.value] = df_files[FilesColumns.SUBTITLE.value].apply(lambda x: "" if pd.isna(x) else x)
-    
     # Convert to list of dictionaries with full paths
+    storage = StorageBackend.get_active()
     result = []
-    for _, row in df_files.iterrows():
-        entry = {
-            FilesColumns.FILE_NAME.value: FilePathManager.get_csv_path(row[FilesColumns.FILE_NAME.value]),
-            FilesColumns.TITLE.value: row[FilesColumns.TITLE.value],
-            FilesColumns.SUBTITLE.value: row[FilesColumns.SUBTITLE.value]
-        }
+    for entry in storage.list_files():
+        # sets registered before summaries existed get their summary once,
+        # sets changed outside the app (another size or modification time of the file) get it again
+        fingerprint = storage.set_fingerprint(entry[FilesColumns.FILE_NAME.value])
+        is_stale = fingerprint is not None and fingerprint != (entry.get(FilesColumns.SIZE.value), entry.get(FilesColumns.MTIME.value))
+        if (entry.get(FilesColumns.ROWS.value) is None or is_stale) and storage.set_exists(entry[FilesColumns.FILE_NAME.value]):
+            try:
+                summary = compute_set_summary(load_set(entry[FilesColumns.FILE_NAME.value]), entry[FilesColumns.FILE_NAME.value])
+            except Exception:
+                summary = None # e.g. a file broken outside the app, it is reported when the set is opened
+            if summary is not None:
+                storage.update_set_summary(entry[FilesColumns.FILE_NAME.value], summary)
+                entry.update(summary)
+        entry[FilesColumns.FILE_NAME.value] = FilePathManager.get_csv_path(entry[FilesColumns.FILE_NAME.value])
         result.append(entry)
     return result
 
 def get_file_names() -> list:
-    # Use FilePathManager for the path to files.csv
-    files_data_path = FilePathManager.get_files_data_path()
-    
-    if not os.path.exists(files_data_path):
-        generate_empty_files_data()
-    
-    df_files = pd.read_csv(files_data_path)
-    return df_files[FilesColumns.FILE_NAME.value].tolist()
+    return StorageBackend.get_active().file_names()
+
+def is_file_name_taken(file_name: str) -> bool:
+    return StorageBackend.get_active().has_file(file_name)
 
 def generate_empty_files_data():
-    # Use FilePathManager for the path to files.csv
-    files_data_path = FilePathManager.get_files_data_path()
-    
-    df = pd.DataFrame(columns=[
-        FilesColumns.FILE_NAME.value,
-        FilesColumns.TITLE.value,
-        FilesColumns.SUBTITLE.value])
-    df.to_csv(files_data_path, index=False)
+    StorageBackend.get_active().create_empty_registry()
 
 def set_default_progress(file_name: str):
     # delate information about learned items and sets default values 
@@ -87,35 +94,14 @@ def set_default_progress(file_name: str):
     save_set(data, file_name)
 
 def delate_set(file_name: str, file_not_exist=False):
-    # Use FilePathManager for the path to files.csv
-    files_data_path = FilePathManager.get_files_data_path()
-    
-    if not os.path.exists(files_data_path):
-        generate_empty_files_data()
-    
-    df_files = pd.read_csv(files_data_path)
-    df_files = df_files[df_files[FilesColumns.FILE_NAME.value] != os.path.basename(file_name)]
-    df_files.to_csv(files_data_path, index=False)
-    
-    full_path = FilePathManager.get_csv_path(file_name)
-    if not file_not_exist and os.path.exists(full_path):
-        os.remove(full_path)
+    StorageBackend.get_active().delete_set(file_name, file_not_exist)
 
 def add_new_file(file_name: str, title: str, subtitle: str = ""):
-    # Use FilePathManager for the path to files.csv
-    files_data_path = FilePathManager.get_files_data_path()
-    
-    if not os.path.exists(files_data_path):
-        generate_empty_files_data()
-    
-    df_files = pd.read_csv(files_data_path)
-    new_row = {
-        FilesColumns.FILE_NAME.value: os.path.basename(file_name),
-        FilesColumns.TITLE.value: title,
-        FilesColumns.SUBTITLE.value: subtitle
-    }
-    df_files = pd.concat([df_files, pd.DataFrame([new_row])], ignore_index=True)
-    df_files.to_csv(files_data_path, index=False)
+    StorageBackend.get_active().add_file(file_name, title, subtitle)
+
+def add_new_files(entries: list):
+    # Registers many sets at once, entries are dictionaries with FilesColumns keys (summaries are optional).
+    StorageBackend.get_active().add_files(entries)
 
 def create_empty_set(kind: str):
     assert kind in ["words", "definitions"], "The kind must be 'words' or 'definitions'."
@@ -170,10 +156,18 @@ def create_empty_set(kind: str):
 class AppData:
     # class attributes
     last_group_of_indexes = []
+    # instances with answers that may still be only in the journal, they are flushed on exit
+    instances = weakref.WeakSet()
     
     def __init__(self, file_name: str):
         self.words = load_set(file_name)
         self.file_name = file_name
+        self.has_unsaved_answers = False
+        self.__class__.instances.add(self)
+        self.__build_buckets()
+        # the registry summary, its counts are updated on every answer
+        self.summary = {FilesColumns.KIND.value: get_kind_of_file_and_validate(file_name)}
+        self.__update_summary_counts()
         self.current_group_of_indexes = []
         self.place_of_group_index = 0
         self.len_of_group = 0
@@ -211,53 +205,65 @@ class AppData:
         for col in self.stats_columns:
             assert col in self.words.columns, f"The column {col} is missing."
     
-    def draw_index_group(self, save_indexes_in_class_art = False) -> int:
+    def __build_buckets(self):
+        # Packs the state of every row into a code and puts the row in the bucket of its state,
+        # both are then updated on every answer.
+        self.state_codes = StateCode.from_data(self.words)
+        self.buckets = [IndexBucket() for _ in range(4)] # indexed by StateCode.BUCKET_...
+        rows = zip(
+            self.words.index,
+            self.words[StatsColumns.CORRECT_ANSWERS.value].to_numpy(),
+            StateCode.BUCKET_OF_CODE[self.state_codes.to_numpy()]
+        )
+        for index, correct_answers, bucket in rows:
+            if bucket != StateCode.NO_BUCKET:
+                self.buckets[bucket].add(index, int(correct_answers))
+    
+    def __remove_from_bucket(self, index):
+        bucket = StateCode.BUCKET_OF_CODE[self.state_codes.at[index]]
+        if bucket != StateCode.NO_BUCKET:
+            self.buckets[bucket].remove(index, int(self.words.at[index, StatsColumns.CORRECT_ANSWERS.value]))
+    
+    def __add_to_bucket(self, index):
+        bucket = StateCode.BUCKET_OF_CODE[self.state_codes.at[index]]
+        if bucket != StateCode.NO_BUCKET:
+            self.buckets[bucket].add(index, int(self.words.at[index, StatsColumns.CORRECT_ANSWERS.value]))
+            
+    def __set_state(self, index, code):
+        # Writes the code and the statistics columns which it is packed from.
+        self.state_codes.at[index] = code
+        for col, value in StateCode.to_flags(code).items():
+            self.words.at[index, col] = value
+    
+    def draw_index_group(self, save_indexes_in_class_art = False, first_index = None) -> int:
         # Draws grup of indexes with the fewest correct answers and returns quantity of indexes.
+        # first_index (e.g. a card found by the search in cards) is asked first, before drawn indexes.
         
-        # Get the indexes where good_answer, good_answers_in_a_row are False 
-        # and word_to_learn is True.
+        # Indexes where good_answer, good_answers_in_a_row are False 
+        # and word_to_learn is True are drawn first.
         # I will indicate like this way: 0/0/1
-        indexes_to_draw = self.words[(self.words[StatsColumns.GOOD_ANSWER.value] == False) &
-                                     (self.words[StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] == False) &
-                                     (self.words[StatsColumns.WORD_TO_LEARN.value] == True)].index
-                
-        # check if there are at least 10 indexes to draw and correct quantity if it is possible.
-        for i in range(2):
-            if len(indexes_to_draw) >= 10:
-                break
-            elif i == 0: # Add to indexes_to_draw indexes where:  0/0/0
-                # quantity of indexes to add.
-                qty_to_add = 10 - len(indexes_to_draw)
-                # Sorting words by correct_answers.
-                self.words.sort_values(by=StatsColumns.CORRECT_ANSWERS.value, inplace=True)
-                # Adding indexes to indexes_to_draw.
-                indexes_to_draw = \
-                    indexes_to_draw.union(self.words[\
-                        (self.words[StatsColumns.GOOD_ANSWER.value] == False) &
-                        (self.words[StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] == False) &
-                        (self.words[StatsColumns.WORD_TO_LEARN.value] == False)].index[:qty_to_add])
-                    
-            elif i == 1: # Add to indexes_to_draw indexes where:  1/0/0 or 1/0/1 or 1/1/1
-                # quantity of indexes to add.
-                qty_to_add = 10 - len(indexes_to_draw)
-                # Sorting words by correct_answers.
-                self.words.sort_values(by=StatsColumns.CORRECT_ANSWERS.value, inplace=True)
-                # Adding indexes to indexes_to_draw.
-                indexes_to_draw = \
-                    indexes_to_draw.union(self.words[\
-                        ((self.words[StatsColumns.GOOD_ANSWER.value] == True) &
-                         (self.words[StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] == False)) |
-                        ((self.words[StatsColumns.GOOD_ANSWER.value] == True) &
-                         (self.words[StatsColumns.WORD_TO_LEARN.value] == True))].index[:qty_to_add])
+        words_to_learn = self.buckets[StateCode.BUCKET_UNKNOWN]
+        if len(words_to_learn) >= 10:
+            indexes_to_draw = words_to_learn.sample(10)
+        else:
+            indexes_to_draw = words_to_learn.all()
+            # Add indexes where 0/0/0 and then 1/0/0 or 1/0/1 or 1/1/1 with the fewest correct answers.
+            for bucket in (StateCode.BUCKET_UNVERIFIED, StateCode.BUCKET_UNCONFIRMED):
+                if len(indexes_to_draw) >= 10:
+                    break
+                indexes_to_draw += self.buckets[bucket].smallest(10 - len(indexes_to_draw))
                     
         number_of_indexes = len(indexes_to_draw)
         if number_of_indexes > 10:
             number_of_indexes = 10
-        elif number_of_indexes == 0:
+        elif number_of_indexes == 0 and first_index is None:
             return 0
         
         # Drawing indexes from indexes_to_draw.
-        indexes = rd.sample(indexes_to_draw.tolist(), number_of_indexes)
+        indexes = rd.sample(indexes_to_draw, number_of_indexes)
+        if first_index is not None:
+            indexes = [first_index] + [index for index in indexes if index != first_index][:9]
+            number_of_indexes = len(indexes)
         self.current_group_of_indexes = indexes
         self.place_of_group_index = 0
         self.len_of_group = number_of_indexes
@@ -298,63 +304,63 @@ class AppData:
         return [col for col in self.current_word_row.index if col not in self.stats_columns]
     
     def good_answer_at_current_row(self):
+        self.__remove_from_bucket(self.current_word_index)
+        
         # Increases the correct answers of the current row.
         self.words.at[self.current_word_index, StatsColumns.CORRECT_ANSWERS.value] += 1
         
-        # Changes in states of the current row.
-        special_case =  self.words.at[self.current_word_index, StatsColumns.GOOD_ANSWER.value] and \
-                        self.words.at[self.current_word_index, StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] and \
-                        self.words.at[self.current_word_index, StatsColumns.WORD_TO_LEARN.value]
-                        
-        spacial_case2 = self.words.at[self.current_word_index, StatsColumns.GOOD_ANSWER.value] and \
-                        (not self.words.at[self.current_word_index, StatsColumns.GOOD_ANSWERS_IN_A_ROW.value]) and \
-                        self.words.at[self.current_word_index, StatsColumns.WORD_TO_LEARN.value]
+        # Changes in states of the current row (e.g. 1/0/1 -> 1/1/0), see StateCode.AFTER_GOOD_ANSWER.
+        previous_code = self.state_codes.at[self.current_word_index]
+        self.__set_state(self.current_word_index, StateCode.AFTER_GOOD_ANSWER[previous_code])
+        
+        self.__save_answer()
         
-        previous_good_answer = self.words.at[self.current_word_index, StatsColumns.GOOD_ANSWER.value]
-        if previous_good_answer:
-            self.words.at[self.current_word_index, StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] = True
+    def bad_answer_at_current_row(self):
+        self.__remove_from_bucket(self.current_word_index)
+        self.__set_state(self.current_word_index, StateCode.AFTER_BAD_ANSWER)
+        self.__save_answer()
         
-        self.words.at[self.current_word_index, StatsColumns.GOOD_ANSWER.value] = True
+    def __update_summary_counts(self):
+        self.summary[FilesColumns.ROWS.value] = self.number_of_all_words()
+        self.summary[FilesColumns.KNOWN.value] = self.number_of_known_words()
+        self.summary[FilesColumns.LEARNING.value] = self.number_of_learning_words()
+        self.summary[FilesColumns.TO_LEARN.value] = len(self.buckets[StateCode.BUCKET_UNVERIFIED])
         
-        if special_case:
-            self.words.at[self.current_word_index, StatsColumns.WORD_TO_LEARN.value] = False
-        elif spacial_case2:
-            self.words.at[self.current_word_index, StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] = True
-            self.words.at[self.current_word_index, StatsColumns.WORD_TO_LEARN.value] = False
+    def __save_answer(self):
+        self.__add_to_bucket(self.current_word_index)
         
-        save_set(self.words, self.file_name)
+        storage = StorageBackend.get_active()
+        # Saves only the current row instead of rewriting the whole set.
+        storage.save_answer(self.words, self.file_name, self.current_word_index)
+        self.has_unsaved_answers = True
         
-    def bad_answer_at_current_row(self):
-        self.words.at[self.current_word_index, StatsColumns.GOOD_ANSWER.value] = False
-        self.words.at[self.current_word_index, StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] = False
-        self.words.at[self.current_word_index, StatsColumns.WORD_TO_LEARN.value] = True
-        save_set(self.words, self.file_name)
+        # The summary is changed only in memory, it is persisted with the set in flush.
+        self.__update_summary_counts()
+        self.summary[FilesColumns.LAST_STUDIED.value] = datetime.now().isoformat(timespec="seconds")
+        storage.update_set_summary(self.file_name, self.summary, persist=False)
+            
+    def flush(self):
+        # Makes sure that answers are stored with the set (e.g. folds the journal of the CSV storage).
+        if self.has_unsaved_answers:
+            storage = StorageBackend.get_active()
+            storage.flush_answers(self.words, self.file_name)
+            storage.update_set_summary(self.file_name, self.summary)
+            self.has_unsaved_answers = False
+            
+    @classmethod
+    def flush_all(cls):
+        for instance in list(cls.instances):
+            instance.flush()
         
     def it_is_not_last_index_of_group(self):
         return self.place_of_group_index != self.len_of_group
 
     def number_of_known_words(self):
-        temp_words = self.words[(self.words[StatsColumns.GOOD_ANSWER.value] == True) &
-                            (self.words[StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] == True) &
-                            (self.words[StatsColumns.WORD_TO_LEARN.value] == False)]
-        
-        if temp_words.empty:
-            return 0
-        else:
-            return len(temp_words)
+        return len(self.buckets[StateCode.BUCKET_KNOWN])
         
     def number_of_learning_words(self):
-        temp_words = self.words[(self.words[StatsColumns.GOOD_ANSWER.value] == False) &
-                            (self.words[StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] == False) &
-                            (self.words[StatsColumns.WORD_TO_LEARN.value] == False)]
-        
-        subtract = 0
-        
-        if not temp_words.empty:
-            subtract = len(temp_words)
-            
-        # number of words learning is computed thanks to subtract other cases. 
-        return len(self.words) - self.number_of_known_words() - subtract 
+        # number of words learning is computed thanks to subtract other cases (1/1/0 and 0/0/0).
+        return len(self.words) - self.number_of_known_words() - len(self.buckets[StateCode.BUCKET_UNVERIFIED])
 
     def number_of_all_words(self):
         return len(self.words)
@@ -368,6 +374,7 @@ class AppData:
     # method created for WordListMenu
     def refresh(self):
         self.words = load_set(self.file_name)
+        self.__build_buckets()
 
     @classmethod
     def was_this_index_drawn(cls, index: int):
@@ -388,15 +395,12 @@ class AppData:
     # statics methods to creating the data.csv files
     @staticmethod
     def create_data_file_words(file_name: str, title: str, subtitle: str = ""):
-        # if file files.csv does not exist, create it.
-        files_data_path = FilePathManager.get_files_data_path()
-        if not os.path.exists(files_data_path):
-            generate_empty_files_data()
-            
         kind = get_kind_of_file_and_validate(file_name)
         
         df = create_empty_set(kind)
-        save_set(df, file_name)
-        
+        # the set is registered first, so save_set can store its summary
         add_new_file(file_name, title, subtitle)
+        save_set(df, file_name)
 
+# answers left in journals are folded into the set files when the app is closed
+atexit.register(AppData.flush_all)
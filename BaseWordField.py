@@ -4,15 +4,19 @@ from page_functions import create_alert_dialog
 import threading
 
 class BaseWordField(ft.Column):
-    def __init__(self, file_name, page=None):
+    def __init__(self, file_name, page=None, start_index=None):
         super().__init__()
         self.horizontal_alignment = ft.CrossAxisAlignment.CENTER
         self.words = AppData(file_name)
         self.file_name = file_name
         self.page = page
         self.lock = threading.Lock()
+        # the card found by the search in cards, it is asked first in the first group
+        self.start_index = start_index if start_index in self.words.words.index else None
 
     def menu(self):
+        # the session has ended, so answers from the journal are saved in the set file
+        self.words.flush()
         self.controls.clear()
         self.controls.append(self.menu_control)
         self.update()
@@ -34,16 +38,18 @@ class BaseWordField(ft.Column):
         )
 
     def back(self):
+        self.words.flush()
         self.words.delete_last_group_of_indexes()
 
     def start(self):
-        if not self.words.are_all_words_learned():
+        if self.start_index is not None or not self.words.are_all_words_learned():
             self.controls.clear()
             self.controls.extend(self.active_controls)
             self.update()
             self.pb.reset()
             self.checkButton.text = "Check"
-            length = self.words.draw_index_group(save_indexes_in_class_art=True)
+            length = self.words.draw_index_group(save_indexes_in_class_art=True, first_index=self.start_index)
+            self.start_index = None
             self.pb.set_max_qty(length)
             self.set_next_word()
         else:
@@ -0,0 +1,74 @@
+import flet as ft
+
+class BulkImportReport(ft.Column):
+    """View with the progress of a bulk import and the result of every file."""
+    def __init__(self, source_name: str, on_done=lambda e: None):
+        super().__init__()
+        self.horizontal_alignment = ft.CrossAxisAlignment.CENTER
+        self.expand = True
+        self.spacing = 15
+
+        self.status_text = ft.Text(f"Importing sets from {source_name}...", text_align=ft.TextAlign.CENTER)
+        self.progress_bar = ft.ProgressBar(value=None, color=ft.Colors.TEAL)
+        self.lv = ft.ListView(expand=True, spacing=5)
+        self.done_button = ft.ElevatedButton(
+            text="Done",
+            icon=ft.Icons.CHECK,
+            on_click=on_done,
+            disabled=True
+        )
+
+        self.controls = [
+            self.status_text,
+            self.progress_bar,
+            self.lv,
+            self.done_button
+        ]
+
+    def show_progress(self, done: int, total: int, report: dict):
+        # called after every checked file, before the sets are saved
+        self.progress_bar.value = done / total
+        self.status_text.value = f"Checked {done} of {total} files..."
+        self.lv.controls.append(self.__report_row(report))
+        self.update()
+
+    def show_result(self, reports: list):
+        imported = sum(report["file_name"] is not None for report in reports)
+        self.progress_bar.value = 1
+        if not reports:
+            self.status_text.value = "No files ending with _words.csv or _definitions.csv were found."
+        else:
+            self.status_text.value = f"Imported {imported} of {len(reports)} sets."
+        # rows are shown again in the order of files with final names of sets
+        self.lv.controls = [self.__report_row(report) for report in reports]
+        self.done_button.disabled = False
+        self.update()
+
+    def show_error(self, message: str):
+        self.progress_bar.value = 0
+        self.status_text.value = f"Import failed:\n{message}"
+        self.done_button.disabled = False
+        self.update()
+
+    @staticmethod
+    def __report_row(report: dict):
+        if report["errors"]:
+            icon = ft.Icon(ft.Icons.ERROR, color=ft.Colors.RED_400)
+            details = report["errors"]
+        elif report["warnings"] or report["information"]:
+            icon = ft.Icon(ft.Icons.WARNING, color=ft.Colors.AMBER)
+            details = report["warnings"] + ([report["information"]] if report["information"] else [])
+        else:
+            icon = ft.Icon(ft.Icons.CHECK_CIRCLE, color=ft.Colors.GREEN)
+            details = []
+
+        # the final name is known only after the sets are saved
+        if report.get("file_name") and report["file_name"] != report["file"]:
+            details = details + [f"Saved as {report['file_name']}"]
+
+        return ft.ListTile(
+            leading=icon,
+            title=ft.Text(report["file"]),
+            subtitle=ft.Text("\n".join(details), size=12) if details else None,
+            dense=True
+        )
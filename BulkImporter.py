@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from CSVProcessor import CSVProcessor
+from FilePathManager import FilePathManager
+from SetLimits import SetLimits
+from constants import Errors
+
+def prepare_imported_set(file_path: str, max_rows: int, keep_statistics: bool) -> dict:
+    # Validates and normalizes one file, it runs in worker processes, so it does not use the registry.
+    report = {
+        "file": os.path.basename(file_path),
+        "errors": [],
+        "warnings": [],
+        "information": "",
+        "prepared": None
+    }
+    try:
+        session = CSVProcessor.open_import_session(file_path, max_rows)
+        report["errors"] = session.errors
+        report["warnings"] = session.warnings
+        if session.is_valid:
+            data, report["information"] = CSVProcessor.normalize_import(session, keep_statistics)
+            report["prepared"] = {
+                "file_name": CSVProcessor.import_file_name(session, file_path),
+                "title": session.name_suggestion,
+                "subtitle": "",
+                "data": data
+            }
+    except Exception:
+        report["errors"] = [Errors.ERROR_LOADING_FILE.value]
+    return report
+
+class BulkImporter:
+    """
+    Import of many sets from a directory or a zip archive of _words.csv/_definitions.csv files.
+
+    Files are validated and normalized in a pool of processes (one by one where processes are not
+    available, e.g. on mobile platforms), then all valid sets are saved and registered in one batch.
+    run() returns one report per file with "file", "errors", "warnings", "information" and "file_name"
+    (None when the set has not been imported).
+    """
+    SUFFIXES = ("_words.csv", "_definitions.csv")
+    # below this number of files starting processes takes longer than the import itself
+    MIN_FILES_FOR_PROCESSES = 4
+
+    def __init__(self, source_path: str, keep_statistics: bool = True, on_progress=None, max_workers: int = None):
+        self.source_path = source_path
+        self.keep_statistics = keep_statistics
+        self.on_progress = on_progress # called with (done, total, report) after every file
+        self.max_workers = max_workers
+        self.__extracted_dir = None
+
+    @classmethod
+    def is_set_file(cls, name: str) -> bool:
+        return os.path.basename(name).endswith(cls.SUFFIXES) and not os.path.basename(name).startswith(".")
+
+    def __collect_files(self) -> list:
+        if zipfile.is_zipfile(self.source_path):
+            return self.__extract_zip()
+        files = []
+        for directory, _, names in os.walk(self.source_path):
+            files.extend(os.path.join(directory, name) for name in names if self.is_set_file(name))
+        return sorted(files)
+
+    def __extract_zip(self) -> list:
+        # only set files are extracted, under their base names, so members cannot leave the directory
+        self.__extracted_dir = tempfile.mkdtemp(prefix="bulk_import_", dir=FilePathManager.get_temp_dir())
+        files = []
+        with zipfile.ZipFile(self.source_path) as archive:
+            for number, member in enumerate(archive.infolist()):
+                if member.is_dir() or not self.is_set_file(member.filename):
+                    continue
+                # the number keeps files with the same name from different directories
+                directory = os.path.join(self.__extracted_dir, str(number))
+                os.makedirs(directory)
+                path = os.path.join(directory, os.path.basename(member.filename))
+                with archive.open(member) as src, open(path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                files.append(path)
+        return sorted(files, key=os.path.basename)
+
+    def run(self) -> list:
+        try:
+            files = self.__collect_files()
+            reports = self.__prepare(files)
+            # the order of files is kept, so names of sets do not depend on the order of workers
+            positions = {path: i for i, path in enumerate(files)}
+            reports.sort(key=lambda report: positions[report["path"]])
+            valid_reports = [report for report in reports if report["prepared"] is not None]
+            file_names = CSVProcessor.save_imported_sets([report["prepared"] for report in valid_reports])
+            for report, file_name in zip(valid_reports, file_names):
+                report["file_name"] = file_name
+            for report in reports:
+                report.setdefault("file_name", None)
+                del report["prepared"], report["path"]
+            return reports
+        finally:
+            if self.__extracted_dir is not None:
+                shutil.rmtree(self.__extracted_dir, ignore_errors=True)
+
+    def __prepare(self, files: list) -> list:
+        # max_rows is passed to workers, which do not know the settings of the app
+        max_rows = SetLimits.get_max_rows()
+        reports = []
+        pending = list(files)
+        if len(files) >= self.MIN_FILES_FOR_PROCESSES and (self.max_workers or os.cpu_count() or 1) > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    futures = {
+                        executor.submit(prepare_imported_set, path, max_rows, self.keep_statistics): path
+                        for path in files
+                    }
+                    for future in as_completed(futures):
+                        path = futures[future]
+                        self.__add_report(reports, future.result(), path, len(files))
+                        pending.remove(path)
+            except (BrokenProcessPool, NotImplementedError, OSError, ImportError):
+                pass # the rest of files is prepared in this process
+        for path in pending:
+            self.__add_report(reports, prepare_imported_set(path, max_rows, self.keep_statistics), path, len(files))
+        return reports
+
+    def __add_report(self, reports: list, report: dict, path: str, total: int):
+        report["path"] = path
+        reports.append(report)
+        if self.on_progress is not None:
+            self.on_progress(len(reports), total, report)
@@ -1,7 +1,13 @@
 import pandas as pd
-from constants import PartsOfSpeech, WordDefinitions, StatsColumns, Warnings, Errors, MAX_ROWS, FilesColumns
-from AppData import load_set, add_new_file, save_set, get_file_names
+from constants import PartsOfSpeech, WordDefinitions, StatsColumns, Warnings, Errors, FilesColumns, IMPORT_CHUNK_ROWS, IMPORT_CHUNKED_MIN_BYTES
+from AppData import load_set, add_new_file, add_new_files, save_set, compute_set_summary, is_file_name_taken
 from FilePathManager import FilePathManager
+from StorageBackend import StorageBackend
+from StateCode import StateCode
+from SetLimits import SetLimits
+from CSVValidator import CSVValidator
+from ValidationCache import ValidationCache
+from ImportSession import ImportSession
 import os
 
 class CSVProcessor:
@@ -34,7 +40,8 @@ class CSVProcessor:
         return file_name
     
     @staticmethod
-    def __create_appropriate_file_name(imported_file_name: str) -> str:
+    def __create_appropriate_file_name(imported_file_name: str, reserved: set = frozenset()) -> str:
+        # reserved are names given to other sets which are not registered yet
         # raise exception if imported_file_name is None
         if imported_file_name is None:
             raise ValueError("imported_file_name cannot be None")
@@ -47,55 +54,26 @@ class CSVProcessor:
         base_name = CSVProcessor.__sanitize_file_name(imported_file_name, chosen_suffix)
         
         # check if the file name is occupied by another file, if so, add a number before the suffix
-        file_names_in_app_data = get_file_names()
-        if base_name in file_names_in_app_data:
+        def is_taken(name):
+            return name in reserved or is_file_name_taken(name)
+        
+        if is_taken(base_name):
             i = 1
             base_without_suffix = base_name[:-len(chosen_suffix)] if chosen_suffix else base_name
-            while f"{base_without_suffix}{i}{chosen_suffix}" in file_names_in_app_data:
+            while is_taken(f"{base_without_suffix}{i}{chosen_suffix}"):
                 i += 1
             base_name = f"{base_without_suffix}{i}{chosen_suffix}"
         return base_name    
     
     @staticmethod
-    def __make_index_from_zero_increasing_by_one(df: pd.DataFrame) -> pd.DataFrame:
+    def __make_index_from_zero_increasing_by_one(df: pd.DataFrame, start: int = 0) -> pd.DataFrame:
         # Remove any 'Unnamed: 0' columns if they exist
         if 'Unnamed: 0' in df.columns:
             df = df.drop(columns=['Unnamed: 0'])
-        # Reset index
-        df.index = range(len(df))
+        # Reset index (a chunk of a set starts at the index of its first row)
+        df.index = range(start, start + len(df))
         return df
     
-    @staticmethod
-    def __read_csv_file(file_path: str, index_present: bool = True) -> pd.DataFrame:
-        try:
-            if index_present:
-                df = pd.read_csv(file_path, index_col=0)
-            else:
-                df = pd.read_csv(file_path)
-        except Exception:
-            # If that fails, load without setting an index
-            df = pd.read_csv(file_path)
-            
-        # Remove any 'Unnamed: 0' columns if they exist
-        if 'Unnamed: 0' in df.columns:
-            df = df.drop(columns=['Unnamed: 0'])
-            
-        return df
-        
-    @staticmethod
-    def __indexes_of_rows_with_insufficient_non_empty_values(df: pd.DataFrame, data_type: str) -> list:
-        # raising exception if data_type is not implemented
-        if data_type not in ["words", "definitions"]:
-            raise ValueError(f"data_type {data_type} is not implemented")
-        # get the indexes of rows with insufficient non-empty values
-        if data_type == "words":
-            typical_columns = [col.value for col in PartsOfSpeech]
-        else:  # data_type == "definitions"
-            typical_columns = [col.value for col in WordDefinitions]
-            
-        indexes = df[typical_columns].isnull().sum(axis=1) >= (len(typical_columns) - 1)
-        return indexes.index[indexes].tolist()
-
     @staticmethod
     def __keep_necessary_columns(df: pd.DataFrame, data_type: str) -> pd.DataFrame:
         if data_type == "words":
@@ -108,74 +86,79 @@ class CSVProcessor:
             raise ValueError(f"data_type {data_type} is not implemented")
             
     @staticmethod
-    def save_set_with_no_specific_actions(
-        file_path: str,
-        file_name: str, 
-        title: str, 
-        subtitle: str, 
-        has_statistics: bool,
-        keep_statistics: bool = False,
-    ) -> None:
-        if file_path is None or file_name is None:
-            raise ValueError("file_path and file_name cannot be None")
-        
-        # Read directly from the provided path
-        df = CSVProcessor.__read_csv_file(file_path)
-        
-        if not has_statistics:
+    def open_import_session(file_path: str, max_rows: int = None) -> ImportSession:
+        # Validates the file and returns the session used to save it as a set,
+        # the frame read by the validation with pandas is kept, so the file is not parsed again.
+        # max_rows is given explicitly by worker processes, which do not know the settings of the app.
+        if max_rows is None:
+            max_rows = SetLimits.get_max_rows()
+        validation_result = CSVValidator(file_path, max_rows).validate()
+        frame = None
+        if validation_result is None:
+            validation_result, frame = CSVProcessor.__validate_file_with_pandas(file_path, max_rows)
+        return ImportSession(file_path, validation_result, frame)
+
+    @staticmethod
+    def normalize_import(session: ImportSession, keep_statistics: bool = False) -> tuple:
+        # Returns the frame of the set ready to be saved and information for the user.
+        # It does not use the registry, so it can run in worker processes.
+        return CSVProcessor.__normalize_frame(session, None, keep_statistics)
+
+    @staticmethod
+    def import_file_name(session: ImportSession, file_name: str) -> str:
+        # Returns the file name with the suffix of the data type, it is made unique when the set is saved
+        warnings_file_name = [
+            Warnings.FILE_NAME_PATTERN_WORDS.value,
+            Warnings.FILE_NAME_PATTERN_DEFINITIONS.value
+        ]
+        if any(warning in session.warnings for warning in warnings_file_name):
+            file_name = CSVProcessor.__sanitize_file_name(os.path.basename(file_name), "")
+            file_name += f"_{session.data_type}.csv"
+        return os.path.basename(file_name)
+
+    @staticmethod
+    def __normalize_frame(session: ImportSession, chunk: pd.DataFrame, keep_statistics: bool, start: int = 0) -> tuple:
+        # normalizes the whole frame of the session (chunk is None) or one of its chunks,
+        # start is the index of the first row of the chunk in the set
+        df = session.frame if chunk is None else chunk
+        if not session.requires_specific_actions:
+            df = CSVProcessor.__normalize_with_no_specific_actions(session, df, keep_statistics)
+            information_after_processing = ""
+        else:
+            # the mask of the whole frame is kept in the session
+            insufficient_rows = session.insufficient_rows_mask(chunk) if Warnings.INSUFFICIENT_NON_EMPTY_VALUES.value in session.warnings else None
+            df, information_after_processing = CSVProcessor.__normalize_with_specific_actions(session, df, insufficient_rows, keep_statistics)
+        # correct the index
+        return CSVProcessor.__make_index_from_zero_increasing_by_one(df, start), information_after_processing
+
+    @staticmethod
+    def __normalize_with_no_specific_actions(session: ImportSession, df: pd.DataFrame, keep_statistics: bool) -> pd.DataFrame:
+        if not session.has_statistics:
             df = CSVProcessor.__add_statistics_columns(df)
         elif not keep_statistics:
             df = CSVProcessor.__reset_statistics_columns(df)
-        
-        # correct the index
-        df = CSVProcessor.__make_index_from_zero_increasing_by_one(df)
-        
-        file_name = CSVProcessor.__create_appropriate_file_name(file_name)
-        add_new_file(file_name, title, subtitle)
-        save_set(df, file_name)
-    
+        return df
+
     @staticmethod
-    def save_set_with_specific_actions(
-        file_path: str,
-        file_name: str,
-        title: str,
-        subtitle: str,
-        data_type: str,
-        has_statistics: bool,
-        warnings: list,
-        keep_statistics: bool = False,
-    ) -> str:
-        if file_path is None or file_name is None or data_type is None:
-            raise ValueError("file_path, file_name and data_type cannot be None")
+    def __normalize_with_specific_actions(session: ImportSession, df: pd.DataFrame, insufficient_rows: pd.Series, keep_statistics: bool) -> tuple:
+        data_type = session.data_type
         if data_type not in ["words", "definitions"]:
             raise ValueError(f"data_type {data_type} is not implemented")
             
         information_after_processing = ""
-        
-        # read the file based on index warning
-        index_present = not Warnings.FIRST_COLUMN_NOT_INDEX.value in warnings
-        df = CSVProcessor.__read_csv_file(file_path, index_present)
+        warnings = session.warnings
+        has_statistics = session.has_statistics
         
         # sort out rows with empty values in typical columns
-        insufficient_non_empty_values_indexes = Warnings.INSUFFICIENT_NON_EMPTY_VALUES.value in warnings
-        if insufficient_non_empty_values_indexes:
-            indexes = CSVProcessor.__indexes_of_rows_with_insufficient_non_empty_values(df, data_type)
-            df = df.drop(indexes)
+        if Warnings.INSUFFICIENT_NON_EMPTY_VALUES.value in warnings:
+            df = df.drop(insufficient_rows.index[insufficient_rows])
             
         # if there are any warnings about statistics, drop the statistics columns
-        statistics_warnings = [
-            Warnings.COLUMN_NOT_BOOLEAN.value,
-            Warnings.COLUMN_NOT_INTEGER.value,
-            Warnings.EMPTY_VALUES_STATISTICS.value,
-            Warnings.INCONSISTENT_STATISTICS_COMBINATION.value,
-            Warnings.NEGATIVE_CORRECT_ANSWERS.value
-        ]
-        
-        if any(warning in warnings for warning in statistics_warnings):
+        if session.has_statistics_warnings():
             information_after_processing += "Statistics columns have errors, so progress information cannot be added. The set will be added to the application without progress data."
             if has_statistics:
                 # Check which statistics columns actually exist before dropping
-                stat_cols_to_drop = [col.value for col in StatsColumns if col.value in df.columns]
+                stat_cols_to_drop = session.statistics_columns(df)
                 if stat_cols_to_drop:
                     df = df.drop(columns=stat_cols_to_drop)
                 has_statistics = False
@@ -198,32 +181,127 @@ class CSVProcessor:
                     # If some statistics columns are missing, reset them
                     df = CSVProcessor.__keep_necessary_columns(df, data_type)
                     df = CSVProcessor.__add_statistics_columns(df)
-                
-        # preparing file name
-        warnings_file_name = [
-            Warnings.FILE_NAME_PATTERN_WORDS.value,
-            Warnings.FILE_NAME_PATTERN_DEFINITIONS.value
-        ]
-        
-        unappropriated_file_name = any(warning in warnings for warning in warnings_file_name)
-        
-        if not unappropriated_file_name:
-            file_name = CSVProcessor.__create_appropriate_file_name(file_name)
-        else:
-            file_name = CSVProcessor.__sanitize_file_name(file_name, "")
-            file_name += f"_{data_type}.csv"
-            file_name = CSVProcessor.__create_appropriate_file_name(file_name)
             
-        # correct the index
-        df = CSVProcessor.__make_index_from_zero_increasing_by_one(df)    
+        return df, information_after_processing
+
+    @staticmethod
+    def __save_import(session: ImportSession, file_name: str, title: str, subtitle: str, keep_statistics: bool) -> str:
+        file_name = CSVProcessor.__create_appropriate_file_name(CSVProcessor.import_file_name(session, file_name))
         
-        add_new_file(file_name, title, subtitle)
-        save_set(df, file_name)
+        if session.should_read_in_chunks(IMPORT_CHUNKED_MIN_BYTES):
+            add_new_file(file_name, title, subtitle)
+            information_after_processing = CSVProcessor.__save_import_in_chunks(session, file_name, keep_statistics)
+        else:
+            df, information_after_processing = CSVProcessor.__normalize_frame(session, None, keep_statistics)
+            add_new_file(file_name, title, subtitle)
+            save_set(df, file_name)
+        session.close()
+        return information_after_processing
+
+    @staticmethod
+    def __save_import_in_chunks(session: ImportSession, file_name: str, keep_statistics: bool) -> str:
+        # Every chunk of the file is normalized and written before the next one is read,
+        # so memory is bounded by the size of a chunk instead of the size of the file.
+        information_after_processing = ""
+        summary = {}
+        
+        def normalized_chunks():
+            nonlocal information_after_processing
+            start = 0
+            for chunk in session.iter_frames(IMPORT_CHUNK_ROWS):
+                df, information_after_processing = CSVProcessor.__normalize_frame(session, chunk, keep_statistics, start)
+                start += len(df)
+                # counts of the summary are added up chunk by chunk
+                for key, value in compute_set_summary(df, file_name).items():
+                    summary[key] = summary.get(key, 0) + value if isinstance(value, int) else value
+                yield df
+        
+        storage = StorageBackend.get_active()
+        storage.save_set_in_chunks(normalized_chunks(), file_name)
+        storage.update_set_summary(file_name, summary)
         return information_after_processing
+
+    @staticmethod
+    def save_set_with_no_specific_actions(
+        session: ImportSession,
+        file_name: str, 
+        title: str, 
+        subtitle: str, 
+        keep_statistics: bool = False,
+    ) -> None:
+        if session is None or file_name is None:
+            raise ValueError("session and file_name cannot be None")
+        
+        CSVProcessor.__save_import(session, file_name, title, subtitle, keep_statistics)
+    
+    @staticmethod
+    def save_set_with_specific_actions(
+        session: ImportSession,
+        file_name: str,
+        title: str,
+        subtitle: str,
+        keep_statistics: bool = False,
+    ) -> str:
+        if session is None or file_name is None or session.data_type is None:
+            raise ValueError("session, file_name and data_type cannot be None")
+            
+        return CSVProcessor.__save_import(session, file_name, title, subtitle, keep_statistics)
+
+    @staticmethod
+    def save_imported_sets(prepared_sets: list) -> list:
+        # Saves sets prepared by normalize_import, e.g. in a bulk import.
+        # prepared_sets is a list of dictionaries with "file_name", "title", "subtitle" and "data" keys.
+        # All sets are written first, then they are added to the registry in one batch.
+        # Returns the final file names in the order of prepared_sets.
+        storage = StorageBackend.get_active()
+        reserved = set()
+        entries = []
+        # validation results of all sets are written to the validation cache once
+        with ValidationCache.deferred_writes():
+            for prepared in prepared_sets:
+                file_name = CSVProcessor.__create_appropriate_file_name(prepared["file_name"], reserved)
+                reserved.add(file_name)
+                storage.save_set(prepared["data"], file_name)
+                entries.append({
+                    FilesColumns.FILE_NAME.value: file_name,
+                    FilesColumns.TITLE.value: prepared["title"],
+                    FilesColumns.SUBTITLE.value: prepared["subtitle"],
+                    **compute_set_summary(prepared["data"], file_name)
+                })
+        add_new_files(entries)
+        return [entry[FilesColumns.FILE_NAME.value] for entry in entries]
     
     @staticmethod
     def validate_file(file_path: str) -> dict:
-        # Function for validating the file of the given path
+        # Function for validating the file of the given path.
+        # The file is read once with the csv module and reading stops when it has too many rows,
+        # files which pandas would read in a different way are validated with pandas.
+        validation_result = CSVValidator(file_path, SetLimits.get_max_rows()).validate()
+        if validation_result is None:
+            validation_result = CSVProcessor.__validate_file_with_pandas(file_path)[0]
+        return validation_result
+
+    @staticmethod
+    def validate_set_file(file_name: str) -> dict:
+        # Function for validating the file of a registered set before it is opened.
+        # The result is cached by the size and the modification time of the file,
+        # so the file is validated again only after it has been changed outside the app.
+        file_path = FilePathManager.get_csv_path(file_name)
+        max_rows = SetLimits.get_max_rows()
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return CSVProcessor.validate_file(file_path) # reports the missing file
+        validation_result = ValidationCache.get(file_path, max_rows, stat)
+        if validation_result is None:
+            validation_result = CSVProcessor.validate_file(file_path)
+            ValidationCache.put(file_path, max_rows, validation_result, stat)
+        return validation_result
+
+    @staticmethod
+    def __validate_file_with_pandas(file_path: str, max_rows: int = None) -> tuple:
+        # Function for validating the file of the given path, the whole file is loaded with pandas.
+        # Returns the validation result and the frame with the detected index (None if the file is not valid).
         errors = []
         warnings = []
         is_valid = True
@@ -293,8 +371,10 @@ class CSVProcessor:
                     requires_specific_actions = True
 
         # Check if the number of rows exceeds the maximum allowed
-        if is_valid and len(df) > MAX_ROWS:
-            errors.append(Errors.TOO_MANY_ROWS.value)
+        if max_rows is None:
+            max_rows = SetLimits.get_max_rows()
+        if is_valid and len(df) > max_rows:
+            errors.append(Errors.TOO_MANY_ROWS.value.format(max_rows))
             is_valid = False
 
         if is_valid:
@@ -324,15 +404,7 @@ class CSVProcessor:
                     requires_specific_actions = True
                     
                 # Create a file name suggestion
-                if file_path.endswith("_words.csv") or file_path.endswith("_definitions.csv"):
-                    for suffix in ["_words.csv", "_definitions.csv"]:
-                        if file_path.endswith(suffix):
-                            name_suggestion = os.path.basename(file_path.split(suffix)[0])
-                            break
-                else:
-                    # If there is no standard suffix, use the file name without the extension
-                    base_name = os.path.basename(file_path)
-                    name_suggestion = base_name.rsplit('.', 1)[0]
+                name_suggestion = CSVValidator.name_suggestion(file_path)
                     
         # Check for statistics columns
         if is_valid:
@@ -374,10 +446,7 @@ class CSVProcessor:
         # Check for inconsistent combinations of statistics and negative values in correct_answers
         if is_valid and has_statistics:
             # check for inconsistent combinations of statistics
-            inconsistent_stats_mask = (
-                (df[StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] == True) & 
-                (df[StatsColumns.GOOD_ANSWER.value] == False)
-            )
+            inconsistent_stats_mask = StateCode.IS_INCONSISTENT[StateCode.from_data(df).to_numpy()]
             
             if inconsistent_stats_mask.any():
                 warnings.append(Warnings.INCONSISTENT_STATISTICS_COMBINATION.value)
@@ -391,7 +460,7 @@ class CSVProcessor:
         # Remove duplicate warnings
         warnings = list(set(warnings))
 
-        return {
+        validation_result = {
             "errors": errors,
             "warnings": warnings,
             "is_valid": is_valid,
@@ -400,6 +469,7 @@ class CSVProcessor:
             "name_suggestion": name_suggestion,
             "data_type": data_type
         }
+        return validation_result, df if is_valid else None
 
     @staticmethod
     def validate_files_csv() -> dict:
@@ -417,8 +487,9 @@ class CSVProcessor:
         
         # Check if files.csv exists
         files_data_path = FilePathManager.get_files_data_path()
-        if not os.path.exists(files_data_path):
-            # If the file doesn't exist, it's ok, since it will be created later in get_file_names_and_titles
+        if not StorageBackend.get_active().is_file_based or not os.path.exists(files_data_path):
+            # If the file doesn't exist, it's ok, since it will be created later in get_file_names_and_titles.
+            # The registry of a storage which is not file based cannot be modified outside the app.
             is_valid = True
             return {
                 "errors": errors,
@@ -427,9 +498,9 @@ class CSVProcessor:
                 "files_data": None
             }
         
-        # Try to load the file with pandas
+        # Try to load the file, it is parsed again only if it has changed since the last read
         try:
-            files_data = pd.read_csv(files_data_path)
+            files_data = StorageBackend.get_active().registry.get_data()
         except Exception as e:
             errors.append(f"Error loading files.csv: {str(e)}")
             is_valid = False
@@ -572,14 +643,14 @@ class CSVProcessor:
                 repair_actions.append(f"Removed {len(invalid_names)} entries with invalid file names")
             
             # Remove entries for missing files
-            missing_files = [name for name in files_data[FilesColumns.FILE_NAME.value] if not os.path.exists(name)]
+            missing_files = [name for name in files_data[FilesColumns.FILE_NAME.value] if not os.path.exists(FilePathManager.get_csv_path(name))]
             if missing_files:
                 files_data = files_data[~files_data[FilesColumns.FILE_NAME.value].isin(missing_files)]
                 repair_actions.append(f"Removed {len(missing_files)} entries for files that don't exist")
             
             # Save the cleaned data if changes were made
             if len(files_data) != original_len or any(["Filled empty" in action for action in repair_actions]):
-                files_data.to_csv("files.csv", index=False)
+                StorageBackend.get_active().registry.replace_data(files_data)
                 repair_actions.append(f"Saved repaired files.csv with {len(files_data)} entries (originally {original_len})")
             
             return {
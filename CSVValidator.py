@@ -0,0 +1,297 @@
+import csv
+import math
+import os
+from operator import itemgetter
+from constants import PartsOfSpeech, WordDefinitions, StatsColumns, Warnings, Errors
+
+class CSVValidator:
+    """
+    Single pass validator of CSV files of learning sets built on the csv module.
+
+    The header is checked first, then all row checks (empty values, types of statistics columns,
+    duplicated index, inconsistent statistics) are made while the rows are read. Reading stops
+    as soon as the file has more rows than the limit, so large files are not parsed.
+    Types of columns are decided like pandas.read_csv does it with default options.
+
+    validate() returns None for files which pandas would read in a different way
+    (e.g. rows longer than the header or duplicated column names), they are validated with pandas.
+    """
+    # values read by pandas as NaN
+    NA_VALUES = {
+        "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+        "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+    }
+    TRUE_VALUE = "true"
+    FALSE_VALUE = "false"
+
+    # kinds of values, the type of a column is decided from the kinds of all its values
+    NA = 1
+    INTEGER = 2
+    FLOAT = 4
+    BOOLEAN = 8
+    TEXT = 16
+
+    INT64_MIN = -2**63
+    UINT64_MAX = 2**64 - 1
+
+    def __init__(self, file_path: str, max_rows: int):
+        self.file_path = file_path
+        self.max_rows = max_rows
+
+    @classmethod
+    def kind_of_value(cls, value: str) -> int:
+        if value in cls.NA_VALUES:
+            return cls.NA
+        if value.lower() in (cls.TRUE_VALUE, cls.FALSE_VALUE):
+            return cls.BOOLEAN
+        if "_" in value or "nan" in value.lower():
+            return cls.TEXT
+        try:
+            number = int(value)
+            return cls.INTEGER if cls.INT64_MIN <= number <= cls.UINT64_MAX else cls.TEXT
+        except ValueError:
+            pass
+        try:
+            number = float(value)
+        except ValueError:
+            return cls.TEXT
+        # values out of the range of float are not converted by pandas
+        if math.isinf(number) and "inf" not in value.lower():
+            return cls.TEXT
+        return cls.FLOAT
+
+    @classmethod
+    def is_numeric(cls, kinds: int, rows: int) -> bool:
+        # an empty column has the object type, a column of only NaN is float
+        if rows == 0 or kinds & cls.TEXT:
+            return False
+        if kinds & cls.BOOLEAN:
+            return kinds == cls.BOOLEAN
+        return True
+
+    @classmethod
+    def is_bool(cls, kinds: int, rows: int) -> bool:
+        return rows > 0 and kinds == cls.BOOLEAN
+
+    @staticmethod
+    def name_suggestion(file_path: str) -> str:
+        if file_path.endswith("_words.csv") or file_path.endswith("_definitions.csv"):
+            for suffix in ["_words.csv", "_definitions.csv"]:
+                if file_path.endswith(suffix):
+                    return os.path.basename(file_path.split(suffix)[0])
+        # If there is no standard suffix, use the file name without the extension
+        base_name = os.path.basename(file_path)
+        return base_name.rsplit('.', 1)[0]
+
+    @staticmethod
+    def __result(errors, warnings, is_valid, requires_specific_actions=False, has_statistics=False,
+                 name_suggestion="", data_type="") -> dict:
+        return {
+            "errors": errors,
+            "warnings": list(set(warnings)),
+            "is_valid": is_valid,
+            "requires_specific_actions": requires_specific_actions,
+            "has_statistics": has_statistics,
+            "name_suggestion": name_suggestion,
+            "data_type": data_type
+        }
+
+    def validate(self):
+        if not self.file_path.endswith('.csv'):
+            return self.__result([Errors.NOT_A_CSV.value], [], False)
+        try:
+            with open(self.file_path, "r", encoding="utf-8-sig", newline="") as f:
+                return self.__validate_rows(csv.reader(f))
+        except FileNotFoundError:
+            return self.__result([Errors.FILE_NOT_FOUND.value], [], False)
+        except (UnicodeDecodeError, csv.Error):
+            return None # the error is reported by pandas
+
+    def __validate_rows(self, reader):
+        header = next(reader, None)
+        if not header or all(not name.strip() for name in header):
+            return None
+        named_columns = [name for name in header if name]
+        if len(set(named_columns)) != len(named_columns):
+            return None # pandas renames duplicated columns
+
+        # columns are found in the header before rows are read
+        words_columns = [col.value for col in PartsOfSpeech]
+        definitions_columns = [col.value for col in WordDefinitions]
+        stats_columns = [col.value for col in StatsColumns]
+        bool_columns = [StatsColumns.GOOD_ANSWER.value, StatsColumns.GOOD_ANSWERS_IN_A_ROW.value, StatsColumns.WORD_TO_LEARN.value]
+        if header[0] in words_columns + definitions_columns + stats_columns:
+            # row checks below assume that such a column is not the index, pandas decides if it is
+            first_column_is_checked = True
+        else:
+            first_column_is_checked = False
+        positions = {name: i for i, name in enumerate(header) if name and (i > 0 or first_column_is_checked)}
+
+        if set(words_columns).issubset(positions):
+            data_type = "words"
+            typical_positions = [positions[col] for col in words_columns]
+        elif set(definitions_columns).issubset(positions):
+            data_type = "definitions"
+            typical_positions = [positions[col] for col in definitions_columns]
+        else:
+            data_type = ""
+            typical_positions = [positions[col] for col in words_columns + definitions_columns if col in positions]
+        has_stats_columns = set(stats_columns).issubset(positions)
+        stats_positions = [positions[col] for col in stats_columns] if has_stats_columns else []
+        correct_answers_position = positions.get(StatsColumns.CORRECT_ANSWERS.value)
+        bool_positions = [positions[col] for col in bool_columns] if has_stats_columns else []
+        good_answer_position = positions.get(StatsColumns.GOOD_ANSWER.value)
+        in_a_row_position = positions.get(StatsColumns.GOOD_ANSWERS_IN_A_ROW.value)
+
+        # state of the checks, they are updated by every row
+        rows = 0
+        first_kinds = 0
+        first_values = set()
+        first_duplicated = False
+        correct_answers_kinds = 0
+        bool_kinds = [0] * len(bool_positions)
+        all_rows_insufficient = True
+        any_row_insufficient = False
+        empty_statistics = False
+        inconsistent_statistics = False
+        negative_correct_answers = False
+        width = len(header)
+        
+        # statistics columns have few distinct values, so their kinds are remembered
+        kinds_cache = {}
+        def kind_of_value(value):
+            kind = kinds_cache.get(value)
+            if kind is None:
+                kind = kinds_cache[value] = self.kind_of_value(value)
+            return kind
+        is_na = self.NA_VALUES.__contains__
+        typical_values = itemgetter(*typical_positions, 0) if typical_positions else None # 0 keeps a tuple for one column
+        stats_values = itemgetter(*stats_positions) if has_stats_columns else None
+        insufficient_limit = len(typical_positions) - 1 if data_type == "words" else 0
+
+        for row in reader:
+            if not row or (len(row) == 1 and not row[0].strip()):
+                continue # blank lines are skipped by pandas
+            if len(row) > width:
+                return None # pandas would use the first column as the index or fail
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+
+            rows += 1
+            if rows > self.max_rows:
+                return self.__too_many_rows(first_kinds, first_duplicated)
+
+            # the first column could be the index
+            value = row[0]
+            if value.isascii() and value.isdigit():
+                kind = self.INTEGER
+            else:
+                kind = self.kind_of_value(value)
+            first_kinds |= kind
+            if not first_duplicated and not first_kinds & self.TEXT:
+                key = self.__index_key(value, kind)
+                if key in first_values:
+                    first_duplicated = True
+                first_values.add(key)
+
+            # empty values in typical columns (words need at least two values, definitions all of them)
+            if typical_values:
+                empty = sum(map(is_na, typical_values(row)[:-1]))
+                insufficient = empty >= insufficient_limit if data_type == "words" else empty > 0
+                all_rows_insufficient = all_rows_insufficient and insufficient
+                any_row_insufficient = any_row_insufficient or insufficient
+
+            # statistics
+            if stats_values:
+                if not empty_statistics and any(map(is_na, stats_values(row))):
+                    empty_statistics = True
+                value = row[correct_answers_position]
+                kind = kind_of_value(value)
+                correct_answers_kinds |= kind
+                if kind & (self.INTEGER | self.FLOAT) and float(value) < 0:
+                    negative_correct_answers = True
+                for j, i in enumerate(bool_positions):
+                    bool_kinds[j] |= kind_of_value(row[i])
+                if not inconsistent_statistics and row[in_a_row_position].lower() == self.TRUE_VALUE \
+                        and row[good_answer_position].lower() == self.FALSE_VALUE:
+                    inconsistent_statistics = True
+
+        errors = []
+        warnings = []
+        requires_specific_actions = False
+        has_statistics = False
+        name_suggestion = ""
+
+        # Check if the first column could serve as an index (numeric and unique values)
+        first_column_is_index = self.is_numeric(first_kinds, rows) and not first_duplicated
+        if first_column_is_index and first_column_is_checked:
+            return None
+        if not first_column_is_index:
+            warnings.append(Warnings.FIRST_COLUMN_NOT_INDEX.value)
+            requires_specific_actions = True
+        columns = [name if name else f"Unnamed: {i}" for i, name in enumerate(header)]
+        if first_column_is_index:
+            columns = columns[1:]
+
+        # Check columns of the detected data type and the file name
+        if not data_type:
+            return self.__result([Errors.NO_MATCHING_COLUMN_PATTERN.value], warnings, False, requires_specific_actions)
+        expected_columns = set(words_columns if data_type == "words" else definitions_columns)
+        if set(columns) - expected_columns - set(stats_columns):
+            warnings.append(Warnings.UNNECESSARY_COLUMNS.value)
+            requires_specific_actions = True
+        if not self.file_path.endswith(f"_{data_type}.csv"):
+            warnings.append(Warnings.FILE_NAME_PATTERN_WORDS.value if data_type == "words" else Warnings.FILE_NAME_PATTERN_DEFINITIONS.value)
+            requires_specific_actions = True
+        name_suggestion = self.name_suggestion(self.file_path)
+
+        # Validate types of statistics columns
+        if has_stats_columns:
+            has_statistics = True
+            if not self.is_numeric(correct_answers_kinds, rows):
+                warnings.append(Warnings.COLUMN_NOT_INTEGER.value)
+                has_statistics = False
+                requires_specific_actions = True
+            if not all(self.is_bool(kinds, rows) for kinds in bool_kinds):
+                warnings.append(Warnings.COLUMN_NOT_BOOLEAN.value)
+                has_statistics = False
+                requires_specific_actions = True
+
+        # Check for empty values in typical columns
+        if all_rows_insufficient:
+            errors.append(Errors.INSUFFICIENT_NON_EMPTY_VALUES_IN_WORDS.value if data_type == "words" else Errors.EMPTY_VALUES_IN_DEFINITIONS.value)
+            errors.append(Errors.MISSING_COLUMNS_DEFINITIONS.value if data_type == "definitions" else Errors.MISSING_COLUMNS_WORDS.value)
+            return self.__result(errors, warnings, False, requires_specific_actions, has_statistics, name_suggestion, data_type)
+        if any_row_insufficient:
+            warnings.append(Warnings.INSUFFICIENT_NON_EMPTY_VALUES.value)
+            requires_specific_actions = True
+
+        # Check for empty values, inconsistent combinations and negative values in statistics columns
+        if has_statistics and empty_statistics:
+            warnings.append(Warnings.EMPTY_VALUES_STATISTICS.value)
+            requires_specific_actions = True
+            has_statistics = False
+        if has_statistics:
+            if inconsistent_statistics:
+                warnings.append(Warnings.INCONSISTENT_STATISTICS_COMBINATION.value)
+                requires_specific_actions = True
+            if negative_correct_answers:
+                warnings.append(Warnings.NEGATIVE_CORRECT_ANSWERS.value)
+                requires_specific_actions = True
+
+        return self.__result(errors, warnings, True, requires_specific_actions, has_statistics, name_suggestion, data_type)
+
+    def __index_key(self, value: str, kind: int):
+        # equal numbers written in a different way (e.g. 1 and 1.0) are duplicates, like NaN values
+        if kind == self.NA:
+            return "NaN"
+        if kind == self.BOOLEAN:
+            return value.lower()
+        return float(value) if kind == self.FLOAT else int(value)
+
+    def __too_many_rows(self, first_kinds: int, first_duplicated: bool) -> dict:
+        # the rest of the file is not read, so the index warning is given only if it is already known
+        warnings = []
+        if first_kinds & self.TEXT or first_duplicated:
+            warnings.append(Warnings.FIRST_COLUMN_NOT_INDEX.value)
+        return self.__result([Errors.TOO_MANY_ROWS.value.format(self.max_rows)], warnings, False, bool(warnings))
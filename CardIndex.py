@@ -0,0 +1,267 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+import pandas as pd
+from FilePathManager import FilePathManager
+from SearchIndex import SearchIndex
+from constants import StatsColumns, CARD_SEARCH_LIMIT
+
+class CardIndex:
+    """
+    Persistent inverted index of cards of all sets (term -> set, row) in card_index.db.
+
+    The text of a card is made of the values of its text columns, terms are words of the text
+    normalized like by SearchIndex. The index keeps the text of every card, so when a set is saved
+    only cards whose text has changed are indexed again. Queries read only the index, no set is opened.
+    Sets kept in files are stored with the size and the modification time of the file, so synchronize
+    indexes again sets changed outside the app.
+    """
+    SETS_TABLE = "indexed_sets"
+    CARDS_TABLE = "card_texts"
+    POSTINGS_TABLE = "postings"
+    TEXT_SEPARATOR = " / "
+    TERM_PATTERN = re.compile(r"\w+")
+
+    _connection = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def __connect(cls):
+        if cls._connection is not None:
+            return cls._connection
+        # flet calls event handlers from different threads, access is serialized by the lock
+        connection = sqlite3.connect(FilePathManager.get_card_index_path(), check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with connection:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {cls.SETS_TABLE} (file_name TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER)")
+            # indexes created before fingerprints of files were stored, their sets are indexed again by synchronize
+            columns = {row[1] for row in connection.execute(f"PRAGMA table_info({cls.SETS_TABLE})")}
+            for column in ("size", "mtime_ns"):
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE {cls.SETS_TABLE} ADD COLUMN {column} INTEGER")
+            connection.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls.CARDS_TABLE} (
+                    file_name TEXT NOT NULL,
+                    row_index INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    PRIMARY KEY (file_name, row_index)
+                ) WITHOUT ROWID""")
+            connection.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls.POSTINGS_TABLE} (
+                    term TEXT NOT NULL,
+                    file_name TEXT NOT NULL,
+                    row_index INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (term, file_name, row_index)
+                ) WITHOUT ROWID""")
+            connection.execute(f"CREATE INDEX IF NOT EXISTS postings_of_cards ON {cls.POSTINGS_TABLE} (file_name, row_index)")
+        cls._connection = connection
+        return connection
+
+    @classmethod
+    def terms(cls, text: str) -> list:
+        return cls.TERM_PATTERN.findall(SearchIndex.normalize(text)[0])
+
+    @classmethod
+    def card_texts(cls, data: pd.DataFrame) -> dict:
+        """Returns texts of cards of the set keyed by their indexes, empty values are skipped."""
+        text_columns = [col for col in data.columns if col not in {col.value for col in StatsColumns}]
+        values = zip(*(data[col].tolist() for col in text_columns))
+        return {
+            int(index): cls.TEXT_SEPARATOR.join(str(value) for value in card if not pd.isna(value))
+            for index, card in zip(data.index, values)
+        }
+
+    # updates of the index
+    @classmethod
+    def update_set(cls, file_name: str, data: pd.DataFrame, fingerprint: tuple = None):
+        """
+        Indexes the saved set, only cards with changed texts are indexed again.
+        fingerprint is (size, mtime_ns) of the written file, see StorageBackend.set_fingerprint.
+        """
+        file_name = os.path.basename(file_name)
+        with cls._lock:
+            connection = cls.__connect()
+            with connection:
+                indexed = cls.__indexed_texts(connection, file_name)
+                cls.__apply(connection, file_name, indexed, cls.card_texts(data))
+                cls.__remove_cards(connection, file_name, indexed.keys() - set(data.index.astype(int)))
+                cls.__mark_indexed(connection, file_name, fingerprint)
+
+    @classmethod
+    def index_chunks(cls, file_name: str, chunks):
+        """
+        Yields the chunks of a set which is being saved and indexes them on the way.
+        Errors of the index do not stop the save, the set is removed from the index and indexed again by synchronize.
+        The file is not written yet when the last chunk is indexed, its fingerprint is stored by set_fingerprint.
+        """
+        file_name = os.path.basename(file_name)
+        try:
+            with cls._lock:
+                indexed = cls.__indexed_texts(cls.__connect(), file_name)
+        except sqlite3.Error:
+            indexed = None
+        seen = set()
+        for chunk in chunks:
+            yield chunk
+            if indexed is None:
+                continue
+            texts = cls.card_texts(chunk)
+            seen.update(texts)
+            try:
+                with cls._lock, cls.__connect() as connection:
+                    cls.__apply(connection, file_name, indexed, texts)
+            except sqlite3.Error:
+                indexed = None
+        if indexed is None:
+            cls.discard_set(file_name)
+            return
+        # all chunks have been saved, cards which are not in the set anymore are removed
+        try:
+            with cls._lock, cls.__connect() as connection:
+                cls.__remove_cards(connection, file_name, indexed.keys() - seen)
+                cls.__mark_indexed(connection, file_name, None)
+        except sqlite3.Error:
+            cls.discard_set(file_name)
+
+    @classmethod
+    def remove_set(cls, file_name: str):
+        file_name = os.path.basename(file_name)
+        with cls._lock, cls.__connect() as connection:
+            connection.execute(f"DELETE FROM {cls.POSTINGS_TABLE} WHERE file_name = ?", (file_name,))
+            connection.execute(f"DELETE FROM {cls.CARDS_TABLE} WHERE file_name = ?", (file_name,))
+            connection.execute(f"DELETE FROM {cls.SETS_TABLE} WHERE file_name = ?", (file_name,))
+
+    @classmethod
+    def set_fingerprint(cls, file_name: str, fingerprint: tuple):
+        file_name = os.path.basename(file_name)
+        with cls._lock, cls.__connect() as connection:
+            connection.execute(
+                f"UPDATE {cls.SETS_TABLE} SET size = ?, mtime_ns = ? WHERE file_name = ?",
+                (*(fingerprint or (None, None)), file_name)
+            )
+
+    @classmethod
+    def __mark_indexed(cls, connection, file_name: str, fingerprint: tuple):
+        connection.execute(
+            f"INSERT OR REPLACE INTO {cls.SETS_TABLE} (file_name, size, mtime_ns) VALUES (?, ?, ?)",
+            (file_name, *(fingerprint or (None, None)))
+        )
+
+    @classmethod
+    def discard_set(cls, file_name: str):
+        """
+        Removes the set like remove_set, errors of card_index.db are not raised. It is used by saving and deleting
+        of sets, which must not fail because of the index, the set is indexed again by synchronize.
+        """
+        try:
+            cls.remove_set(file_name)
+        except sqlite3.Error:
+            pass # e.g. the database is locked or corrupt, searches in cards fail with the same error
+
+    @classmethod
+    def synchronize(cls, storage):
+        """
+        Indexes registered sets which are not indexed yet (e.g. saved before the index existed) or whose files
+        have changed since they were indexed (e.g. edited outside the app), and removes deleted sets.
+        Only files are checked, sets are loaded only when they have to be indexed.
+        """
+        file_names = [os.path.basename(file_name) for file_name in storage.file_names()]
+        with cls._lock:
+            indexed = {row[0]: tuple(row[1:]) for row in cls.__connect().execute(f"SELECT file_name, size, mtime_ns FROM {cls.SETS_TABLE}")}
+        for file_name in indexed.keys() - set(file_names):
+            cls.remove_set(file_name)
+        for file_name in file_names:
+            fingerprint = storage.set_fingerprint(file_name)
+            if file_name in indexed and (fingerprint is None or indexed[file_name] == fingerprint):
+                continue
+            try:
+                data = storage.load_set(file_name) if storage.set_exists(file_name) else None
+            except Exception:
+                data = None # e.g. a file broken outside the app, it is reported when the set is opened
+            if data is None:
+                cls.remove_set(file_name)
+            else:
+                cls.update_set(file_name, data, fingerprint)
+
+    @classmethod
+    def __indexed_texts(cls, connection, file_name: str) -> dict:
+        rows = connection.execute(f"SELECT row_index, text FROM {cls.CARDS_TABLE} WHERE file_name = ?", (file_name,))
+        return dict(rows)
+
+    @classmethod
+    def __apply(cls, connection, file_name: str, indexed: dict, texts: dict):
+        changed = [(index, text) for index, text in texts.items() if indexed.get(index) != text]
+        if not changed:
+            return
+        cls.__remove_cards(connection, file_name, [index for index, _ in changed], keep_texts=True)
+        connection.executemany(
+            f"INSERT OR REPLACE INTO {cls.CARDS_TABLE} VALUES (?, ?, ?)",
+            [(file_name, index, text) for index, text in changed]
+        )
+        connection.executemany(
+            f"INSERT INTO {cls.POSTINGS_TABLE} VALUES (?, ?, ?, ?)",
+            [
+                (term, file_name, index, count)
+                for index, text in changed
+                for term, count in Counter(cls.terms(text)).items()
+            ]
+        )
+        indexed.update(changed)
+
+    @classmethod
+    def __remove_cards(cls, connection, file_name: str, indexes, keep_texts: bool = False):
+        parameters = [(file_name, int(index)) for index in indexes]
+        connection.executemany(f"DELETE FROM {cls.POSTINGS_TABLE} WHERE file_name = ? AND row_index = ?", parameters)
+        if not keep_texts:
+            connection.executemany(f"DELETE FROM {cls.CARDS_TABLE} WHERE file_name = ? AND row_index = ?", parameters)
+
+    # queries
+    @classmethod
+    def search(cls, query: str, limit: int = CARD_SEARCH_LIMIT) -> list:
+        """
+        Returns cards containing all terms of the query ranked by tf-idf, as dictionaries with
+        "file_name", "row_index", "text" and "score". The last term matches also longer terms,
+        unless the query ends with a space, so results follow typing.
+        """
+        terms = cls.terms(query)
+        if not terms:
+            return []
+        with cls._lock:
+            connection = cls.__connect()
+            number_of_cards = connection.execute(f"SELECT COUNT(*) FROM {cls.CARDS_TABLE}").fetchone()[0]
+            scores = None
+            for position, term in enumerate(terms):
+                if position == len(terms) - 1 and not query[-1:].isspace():
+                    rows = connection.execute(
+                        f"SELECT file_name, row_index, count FROM {cls.POSTINGS_TABLE} WHERE term >= ? AND term < ?",
+                        (term, term + "\uffff")
+                    )
+                else:
+                    rows = connection.execute(
+                        f"SELECT file_name, row_index, count FROM {cls.POSTINGS_TABLE} WHERE term = ?", (term,)
+                    )
+                counts = Counter()
+                for file_name, row_index, count in rows:
+                    counts[(file_name, row_index)] += count
+                if not counts:
+                    return []
+                idf = math.log(1 + number_of_cards / len(counts))
+                term_scores = {card: (1 + math.log(count)) * idf for card, count in counts.items()}
+                # every term of the query has to be in the card
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {card: score + term_scores[card] for card, score in scores.items() if card in term_scores}
+            best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            results = []
+            for (file_name, row_index), score in best:
+                text = connection.execute(
+                    f"SELECT text FROM {cls.CARDS_TABLE} WHERE file_name = ? AND row_index = ?", (file_name, row_index)
+                ).fetchone()[0]
+                results.append({"file_name": file_name, "row_index": row_index, "text": text, "score": score})
+            return results
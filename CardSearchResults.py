@@ -0,0 +1,26 @@
+import flet as ft
+import os
+
+class CardSearchResults(ft.ListView):
+    """
+    List of cards found by CardIndex.search, a card is shown with the title of its set.
+    Clicking a card calls on_open(e, file_name, row_index).
+    """
+    def __init__(self, results: list, titles: dict, on_open):
+        super().__init__(expand=True, spacing=5)
+        self.on_open = on_open
+        if not results:
+            self.controls = [ft.Text("No cards found.", italic=True)]
+            return
+        self.controls = [self.__create_result(result, titles) for result in results]
+
+    def __create_result(self, result: dict, titles: dict):
+        file_name = result["file_name"]
+        icon = ft.Icons.HELP if file_name.endswith("_definitions.csv") else ft.Icons.BOOK
+        return ft.ListTile(
+            leading=ft.Icon(icon),
+            title=ft.Text(result["text"], max_lines=2, overflow=ft.TextOverflow.ELLIPSIS),
+            subtitle=ft.Text(titles.get(file_name, os.path.splitext(file_name)[0])),
+            on_click=lambda e: self.on_open(e, file_name, result["row_index"]),
+            dense=True
+        )
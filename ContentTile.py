@@ -4,15 +4,19 @@ from WordDefinitionField import WordDefinitionField
 from AppData import delate_set, set_default_progress, get_kind_of_file_and_validate
 from page_functions import create_alert_dialog
 from PageProperties import PageProperties
+from StorageBackend import StorageBackend
+from constants import FilesColumns, Errors, EXPORT_PROGRESS_MIN_BYTES
 from FilePathManager import FilePathManager
 # imports for export method
 import os
 
 class ContentTile(ft.Card):
-    def __init__(self, file_name: str, title: str, subtitle: str = "", parent_container=None, key=None, export_mode = False):
+    def __init__(self, file_name: str, title: str, subtitle: str = "", parent_container=None, key=None, export_mode = False, summary: dict = None, selected: bool = False):
         super().__init__(key=key)
         self.parent_container = parent_container
         self.title = title
+        self.subtitle = subtitle
+        self.indication = None # (spans, main_color) of the highlighted pattern
         
         kind = get_kind_of_file_and_validate(file_name)
         
@@ -34,11 +38,22 @@ class ContentTile(ft.Card):
             on_open=lambda e: self.file_not_found_dialog(e) if not self.__file_exist() else None
         )
         
+        # progress badge from the summary kept in the registry, the set is not opened
+        trailing_controls = []
+        if summary and summary.get(FilesColumns.ROWS.value) is not None:
+            trailing_controls.append(self.__progress_badge(summary))
+        if not export_mode:
+            trailing_controls.append(self.popUpButton)
+        else:
+            # sets selected for the export to one zip archive
+            self.export_checkbox = ft.Checkbox(value=selected, on_change=self.__on_export_checkbox_change)
+            trailing_controls.append(self.export_checkbox)
+        
         lt = ft.ListTile(
             leading=leadingIcon,
             title=ft.Text(title, size=20),
             subtitle=ft.Text(subtitle) if subtitle else None,
-            trailing=self.popUpButton if not export_mode else None,
+            trailing=ft.Row(trailing_controls, tight=True, spacing=0) if trailing_controls else None,
             on_click=self.open_set if not export_mode else self.export,
             dense=True,  # Make the ListTile more compact
             min_height=75
@@ -47,6 +62,23 @@ class ContentTile(ft.Card):
         self.content = lt
         self.margin = 5  # Add some margin around the card
 
+    @staticmethod
+    def __progress_badge(summary: dict):
+        known = summary[FilesColumns.KNOWN.value]
+        rows = summary[FilesColumns.ROWS.value]
+        return ft.Container(
+            content=ft.Text(f"{known}/{rows}", size=12, color=ft.Colors.WHITE),
+            bgcolor=ft.Colors.GREEN if rows > 0 and known == rows else ft.Colors.BLUE_GREY,
+            border_radius=10,
+            padding=ft.padding.symmetric(horizontal=8, vertical=2),
+            tooltip=f"Known: {known}\nLearning: {summary[FilesColumns.LEARNING.value]}\nTo learn: {summary[FilesColumns.TO_LEARN.value]}"
+        )
+
+    def __on_export_checkbox_change(self, e):
+        # the selection is kept by the container, so it survives refreshing of tiles
+        if self.parent_container is not None:
+            self.parent_container.select_for_export(self.file_name, self.export_checkbox.value)
+
     def edit(self, e):
         from page_functions import quit_main_menu
         from EditSetMenu import EditSetMenu
@@ -92,17 +124,27 @@ class ContentTile(ft.Card):
     def set_default_progress(self, e):
         # Logic for setting default progress
         set_default_progress(self.file_name)
+        if self.parent_container is not None:
+            self.parent_container.refresh_content() # the progress badge has changed
         e.page.update()
         
     def __validate_file_before_opening(self, e):
         from CSVProcessor import CSVProcessor
         
-        if not self.__file_exist():
+        # sets kept outside of files cannot be modified externally
+        if not StorageBackend.get_active().is_file_based:
+            if not self.__file_exist():
+                self.file_not_found_dialog(e)
+                return False
+            return True
+        
+        # one stat of the file when it has not been changed since it was saved or validated
+        validation_result = CSVProcessor.validate_set_file(self.file_name)
+        
+        if Errors.FILE_NOT_FOUND.value in validation_result["errors"]:
             self.file_not_found_dialog(e)
             return False
         
-        validation_result = CSVProcessor.validate_file(self.file_name)
-        
         if not validation_result["is_valid"] or len(validation_result["warnings"]) > 0 or not validation_result["has_statistics"]:
             error_message = "The file has been modified externally and cannot be opened correctly in the application.\n\n"
             
@@ -131,7 +173,8 @@ class ContentTile(ft.Card):
         
         return True
 
-    def open_set(self, e):
+    def open_set(self, e, start_index=None):
+        # start_index is the index of the card asked first, e.g. found by the search in cards
         if not self.__validate_file_before_opening(e):
             return
         
@@ -141,10 +184,10 @@ class ContentTile(ft.Card):
         e.page.floating_action_button.visible = False
         PageProperties.set_width_height_from_page(e.page)
         if self.kind == "words":
-            wf = WordFields(self.file_name, page=e.page, width=PageProperties.width*0.8)
+            wf = WordFields(self.file_name, page=e.page, width=PageProperties.width*0.8, start_index=start_index)
             e.page.add(wf)
         elif self.kind == "definitions":
-            wdf = WordDefinitionField(self.file_name, page=e.page, width=PageProperties.width*0.8)
+            wdf = WordDefinitionField(self.file_name, page=e.page, width=PageProperties.width*0.8, start_index=start_index)
             e.page.add(wdf)
         e.page.update()
         
@@ -158,61 +201,82 @@ class ContentTile(ft.Card):
         self.delete_item(e, file_not_exist=True)
         
     def __file_exist(self):
-        file_path = FilePathManager.get_csv_path(self.file_name)
-        try:
-            with open(file_path, "r"):
-                pass
-        except FileNotFoundError:
-            return False
-        return True
+        return StorageBackend.get_active().set_exists(self.file_name)
     
     # methods involved with logic of searching
-    def contains_pattern(self, pattern: str):
-        return pattern.lower() in self.title.lower()
-    
-    def indicate_pattern(self, pattern: str, main_color = False):
-        assert pattern != "", "Pattern must not be empty."
-        
-        title_text = self.title
-        pattern_lower = pattern.lower()
-        title_lower = title_text.lower()
+    def indicate_pattern(self, spans: tuple, main_color = False, update = True) -> bool:
+        """
+        Highlights (start, end) spans of the title and the subtitle, see SearchIndex.spans.
+        Returns False when the tile is already highlighted like this. With update=False the tile is changed
+        only in memory, so the container can send changes of many tiles at once.
+        """
+        if self.indication == (spans, main_color):
+            return False
+        self.indication = (spans, main_color)
+        title_spans, subtitle_spans = spans
         bgcolor = ft.Colors.YELLOW
         if main_color:
             bgcolor = ft.Colors.LIGHT_BLUE
-        color = ft.Colors.BLACK
-        
-        start = 0
-        spans = []
-        
-        while start < len(title_lower):
-            start = title_lower.find(pattern_lower, start)
-            if start == -1:
-                break
-            end = start + len(pattern)
-            spans.append((start, end))
-            start = end
         
+        self.content.title = self.__highlighted_text(self.title, title_spans, bgcolor, size=20)
+        if self.subtitle:
+            self.content.subtitle = self.__highlighted_text(self.subtitle, subtitle_spans, bgcolor)
+        if update:
+            self.content.update()
+        return True
+    
+    @staticmethod
+    def __highlighted_text(text: str, spans: list, bgcolor, size=None):
         if not spans:
-            return
+            return ft.Text(text, size=size)
         
         formatted_text = []
         last_index = 0
         
         for start, end in spans:
             if last_index < start:
-                formatted_text.append(ft.TextSpan(text=title_text[last_index:start]))
-            formatted_text.append(ft.TextSpan(title_text[start:end], ft.TextStyle(bgcolor=bgcolor, color=color)))
+                formatted_text.append(ft.TextSpan(text=text[last_index:start]))
+            formatted_text.append(ft.TextSpan(text[start:end], ft.TextStyle(bgcolor=bgcolor, color=ft.Colors.BLACK)))
             last_index = end
         
-        if last_index < len(title_text):
-            formatted_text.append(ft.TextSpan(text=title_text[last_index:]))
+        if last_index < len(text):
+            formatted_text.append(ft.TextSpan(text=text[last_index:]))
         
-        self.content.title = ft.Text(spans=formatted_text, size=20)
-        self.content.update()
+        return ft.Text(spans=formatted_text, size=size)
 
-    def reset_indication(self):
+    def reset_indication(self, update = True) -> bool:
+        # returns False when the tile is not highlighted, see indicate_pattern
+        if self.indication is None:
+            return False
+        self.indication = None
         self.content.title = ft.Text(self.title, size=20)
-        self.content.update()
+        if self.subtitle:
+            self.content.subtitle = ft.Text(self.subtitle)
+        if update:
+            self.content.update()
+        return True
+    
+    def __export_progress_dialog(self, page):
+        # Returns the opened dialog with the progress of the export and its callback, or (None, None) for small sets.
+        storage = StorageBackend.get_active()
+        if not storage.is_file_based or os.path.getsize(FilePathManager.get_csv_path(self.file_name)) < EXPORT_PROGRESS_MIN_BYTES:
+            return None, None
+        
+        progress_bar = ft.ProgressBar(value=0, color=ft.Colors.TEAL)
+        progress_dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Exporting..."),
+            content=ft.Column([ft.Text(self.title), progress_bar], tight=True)
+        )
+        page.open(progress_dialog)
+        
+        def on_progress(written_bytes, total_bytes):
+            # the bar is updated only when the visible value changes
+            value = round(written_bytes / total_bytes, 2) if total_bytes else None
+            if value != progress_bar.value:
+                progress_bar.value = value
+                progress_bar.update()
+        return progress_dialog, on_progress
     
     def export(self, e):
         if not self.__file_exist():
@@ -233,15 +297,7 @@ class ContentTile(ft.Card):
             if not picker_result.path:
                 return  # Selection canceled
             
-            def copy2(src: str, dst: str):
-                with open(src, 'rb') as fsrc:
-                    with open(dst, 'wb') as fdst:
-                        fdst.write(fsrc.read())
-            
             try:
-                # Use FilePathManager to get full path of source file
-                src_file_path = FilePathManager.get_csv_path(self.file_name)
-                
                 if is_windows:
                     # For Windows - the path points directly to the destination file
                     destination_path = picker_result.path
@@ -251,8 +307,13 @@ class ContentTile(ft.Card):
                     # For other platforms - the path points to the directory, the file name needs to be added
                     destination_path = os.path.join(picker_result.path, os.path.basename(self.file_name))
                 
-                # Copy file to selected location
-                copy2(src_file_path, destination_path)
+                # Write the set as a csv file to selected location, the file is streamed with progress for large sets
+                progress_dialog, on_progress = self.__export_progress_dialog(e.page)
+                try:
+                    StorageBackend.get_active().export_set(self.file_name, destination_path, on_progress)
+                finally:
+                    if progress_dialog is not None:
+                        e.page.close(progress_dialog)
                 
                 # Show success message
                 create_alert_dialog(
@@ -1,5 +1,5 @@
 import flet as ft 
-from AppData import get_file_names, sanitize_file_name
+from AppData import is_file_name_taken, sanitize_file_name
 from EditSetMenu import EditSetMenu
 from constants import FilesColumns
 from page_functions import create_alert_dialog
@@ -71,9 +71,6 @@ class CreateSetMenu(ft.Column):
                 close_button_text="OK"
             )
         else:
-            # load list of file_names to create new file_name
-            filenames = get_file_names()
-            
             kind = self.kind_dropdown.value.lower()
             
             if kind == "word formations":
@@ -87,7 +84,7 @@ class CreateSetMenu(ft.Column):
             counter = 1
             new_file_name = sanitized_title
             while checking:
-                if new_file_name in filenames:
+                if is_file_name_taken(new_file_name):
                     base_name = sanitized_title.replace(f"_{kind}.csv", "")
                     new_file_name = sanitize_file_name(f"{base_name}{counter}", kind)
                     counter += 1
@@ -2,13 +2,12 @@ import flet as ft
 import pandas as pd
 from EditCards import EditCardWords, EditCardDefinitions
 from AppData import save_set, load_set, create_empty_set, get_kind_of_file_and_validate
-from constants import PartsOfSpeech, StatsColumns, WordDefinitions, MAX_ROWS
+from constants import PartsOfSpeech, StatsColumns, WordDefinitions, LIST_PAGE_SIZE
 from page_functions import create_alert_dialog
 from PageProperties import PageProperties
+from SetLimits import SetLimits
 
 class EditSetMenu(ft.Column):
-    MAX_CARDS = MAX_ROWS
-
     def __init__(self, file_name: str, width=340, title=None, subtitle=None):
         super().__init__()
         self.alignment = ft.MainAxisAlignment.CENTER
@@ -61,46 +60,60 @@ class EditSetMenu(ft.Column):
 
         if title is None:
             words = load_set(file_name)
-            assert len(words) <= self.MAX_CARDS, f"Error: The file contains more than {self.MAX_CARDS} cards."
         else:
             words = create_empty_set(self.kind)
 
-        words_columns = [
-            PartsOfSpeech.VERB.value,
-            PartsOfSpeech.PERSON.value,
-            PartsOfSpeech.THING.value,
-            PartsOfSpeech.ADJECTIVE.value,
-            PartsOfSpeech.ADVERB.value
-        ]
-        
-        definitions_columns = [
-            WordDefinitions.WORD.value,
-            WordDefinitions.DEFINITION.value,
+        # cards are created page by page, rows without a card are kept unchanged on save
+        self.words = words
+        self.number_of_rendered_rows = 0
+        self.show_more_button = ft.TextButton(
+            text="Show more",
+            icon=ft.Icons.EXPAND_MORE,
+            on_click=self.on_show_more_click
+        )
+        self.__add_next_page_of_cards()
+
+        self.controls = [
+            self.main_container,
+            self.buttons_row
         ]
 
-        for i in range(len(words)):
-            words_row = words.iloc[i]            
+    def __add_next_page_of_cards(self):
+        # Adds cards of the next rows before the buttons at the end of the list.
+        for button in (self.show_more_button, self.addButton):
+            if button in self.lv.controls:
+                self.lv.controls.remove(button)
+
+        end = min(self.number_of_rendered_rows + LIST_PAGE_SIZE, len(self.words))
+        for i in range(self.number_of_rendered_rows, end):
             if self.kind == "words":
-                words_row = words_row[words_columns]
-                self.lv.controls.append(EditCardWords(self.lv, words_row=words.iloc[i]))
+                self.lv.controls.append(EditCardWords(self.lv, words_row=self.words.iloc[i]))
             elif self.kind == "definitions":
-                words_row = words_row[definitions_columns]
-                self.lv.controls.append(EditCardDefinitions(self.lv, words_row=words.iloc[i]))
+                self.lv.controls.append(EditCardDefinitions(self.lv, words_row=self.words.iloc[i]))
+        self.number_of_rendered_rows = end
+
+        if self.number_of_rendered_rows < len(self.words):
+            self.lv.controls.append(self.show_more_button)
         # make button bottom
-        self.lv.controls.remove(self.addButton)
         self.lv.controls.append(self.addButton)
 
-        self.controls = [
-            self.main_container,
-            self.buttons_row
-        ]
+    def on_show_more_click(self, e):
+        self.lv.auto_scroll = False
+        self.__add_next_page_of_cards()
+        self.update()
+
+    def __number_of_cards(self):
+        # cards in the list and rows which do not have a card yet
+        cards = sum(isinstance(control, (EditCardWords, EditCardDefinitions)) for control in self.lv.controls)
+        return cards + len(self.words) - self.number_of_rendered_rows
 
     def on_add_click(self, e):
-        if len(self.lv.controls) - 1 >= self.MAX_CARDS:  # -1 because addButton is also in controls
+        max_cards = SetLimits.get_max_rows()
+        if self.__number_of_cards() >= max_cards:
             create_alert_dialog(
                 page=e.page,
                 title="Alert",
-                content=f"Cannot add more than {self.MAX_CARDS} cards.",
+                content=f"Cannot add more than {max_cards} cards.",
                 close_button_text="OK"
             )
             return
@@ -124,7 +137,7 @@ class EditSetMenu(ft.Column):
         return True
     
     def __no_cards(self, e):
-        if len(self.lv.controls) == 1:
+        if self.__number_of_cards() == 0:
             create_alert_dialog(
                 page=e.page,
                 title="Alert",
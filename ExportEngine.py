@@ -0,0 +1,108 @@
+import os
+import sys
+import secrets
+import time
+import zipfile
+
+class ExportEngine:
+    """
+    Streaming writer of exported files.
+
+    Every export is written to a temporary file in the directory of the destination, which replaces
+    the destination only when it is complete, so a failed export never leaves a partial file.
+    Files are copied with os.sendfile where the kernel supports it and with a fixed buffer otherwise,
+    so memory does not depend on the size of the file. on_progress is called with
+    (written_bytes, total_bytes) after every block, total_bytes is None when it is not known.
+    """
+    BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, on_progress=None):
+        self.on_progress = on_progress
+        self.written_bytes = 0
+        self.total_bytes = None
+
+    def copy_file(self, source_path: str, destination_path: str):
+        """Copies the file to the destination."""
+        self.total_bytes = os.path.getsize(source_path)
+        with open(source_path, "rb") as src:
+            self.write_file(destination_path, lambda dst: self.copy_stream(src, dst))
+
+    def write_file(self, destination_path: str, write_function):
+        """Calls write_function with a binary file object and moves the written file to the destination."""
+        directory, name = os.path.split(os.path.abspath(destination_path))
+        # the file is created like the destination would be (with the permissions given by the umask)
+        temp_path = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.tmp")
+        try:
+            with open(temp_path, "xb") as dst:
+                write_function(dst)
+            os.replace(temp_path, destination_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def write_archive(self, destination_path: str, members: list, on_member=None):
+        """
+        Writes a zip archive, members are (name, source) pairs where source is the path of a file
+        or a function writing the content to a binary file object. Members are compressed one by one
+        while they are streamed, so only one block is in memory. on_member is called with
+        (written_members, all_members) after every member.
+        """
+        # the size of content written by functions is not known in advance and it is not reported,
+        # so the progress is given by files (e.g. sets of the CSV backend without the small files.csv)
+        sizes = [os.path.getsize(source) for _, source in members if isinstance(source, str)]
+        self.total_bytes = sum(sizes) if sizes else None
+
+        def write_members(dst):
+            with zipfile.ZipFile(dst, "w", allowZip64=True) as archive:
+                for number, (name, source) in enumerate(members, start=1):
+                    info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    with archive.open(info, "w", force_zip64=True) as entry:
+                        if isinstance(source, str):
+                            with open(source, "rb") as src:
+                                self.copy_stream(src, entry, use_sendfile=False) # entries are compressed in the process
+                        else:
+                            source(entry)
+                    if on_member is not None:
+                        on_member(number, len(members))
+        self.write_file(destination_path, write_members)
+
+    def copy_stream(self, src, dst, use_sendfile: bool = True):
+        """Copies the rest of the src file object to dst block by block."""
+        if use_sendfile and sys.platform.startswith("linux") and hasattr(os, "sendfile"):
+            try:
+                self.__sendfile(src, dst)
+                return
+            except OSError:
+                pass # e.g. file systems which do not support sendfile, the copy continues with the buffer
+        buffer = bytearray(self.BUFFER_SIZE)
+        view = memoryview(buffer)
+        while True:
+            size = src.readinto(buffer)
+            if not size:
+                break
+            dst.write(view[:size])
+            self.__report(size)
+
+    def __sendfile(self, src, dst):
+        # the data is copied by the kernel without passing through the memory of the process
+        dst.flush()
+        in_fd, out_fd = src.fileno(), dst.fileno()
+        offset = src.tell()
+        try:
+            while True:
+                sent = os.sendfile(out_fd, in_fd, offset, self.BUFFER_SIZE)
+                if sent == 0:
+                    break
+                offset += sent
+                self.__report(sent)
+        finally:
+            # file objects continue after the copied data
+            src.seek(offset)
+            dst.seek(0, os.SEEK_END)
+
+    def __report(self, size: int):
+        self.written_bytes += size
+        if self.on_progress is not None:
+            self.on_progress(self.written_bytes, self.total_bytes)
@@ -42,6 +42,24 @@ class FilePathManager:
         cls.initialize()
         return os.path.join(cls._csv_dir, "files.csv")
     
+    @classmethod
+    def get_database_path(cls):
+        """Returns the path to the SQLite database used by the sqlite storage backend"""
+        cls.initialize()
+        return os.path.join(cls._csv_dir, "learning_sets.db")
+    
+    @classmethod
+    def get_validation_cache_path(cls):
+        """Returns the path to the cache of validation results of set files"""
+        cls.initialize()
+        return os.path.join(cls._csv_dir, "validation_cache.json")
+    
+    @classmethod
+    def get_card_index_path(cls):
+        """Returns the path to the full-text index of cards of all sets"""
+        cls.initialize()
+        return os.path.join(cls._csv_dir, "card_index.db")
+    
     @classmethod
     def get_data_dir(cls):
         """Returns the application data directory"""
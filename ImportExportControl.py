@@ -4,6 +4,11 @@ from page_functions import create_alert_dialog, is_instance_in_the_page
 from TilesContainer import TilesContainer
 from SearchControl import SearchControl
 from CSVProcessor import CSVProcessor
+from BulkImporter import BulkImporter
+from BulkImportReport import BulkImportReport
+from StorageBackend import StorageBackend
+import os
+from datetime import datetime
  
 class ImportExportControl(ft.Container):
     SCALE_IMPORT_BUTTON = 1.25
@@ -66,6 +71,27 @@ class ImportExportControl(ft.Container):
             scale=ImportExportControl.SCALE_IMPORT_BUTTON,
         )
         
+        # bulk import of all sets from a folder or a zip archive
+        self.import_folder_button = ft.TextButton(
+            text="Import folder",
+            icon=ft.Icons.FOLDER_COPY,
+            on_click=self.__on_import_folder_click,
+        )
+        
+        self.import_zip_button = ft.TextButton(
+            text="Import zip",
+            icon=ft.Icons.ARCHIVE,
+            on_click=self.__on_import_zip_click,
+        )
+        
+        self.bulk_import_buttons = ft.Row(
+            [
+                self.import_folder_button,
+                self.import_zip_button,
+            ],
+            alignment=ft.MainAxisAlignment.CENTER,
+        )
+        
         self.cancel_button = ft.ElevatedButton(
             text="Cancel",
             on_click=self.__on_cancel_button_click,
@@ -84,7 +110,7 @@ class ImportExportControl(ft.Container):
         
         
         self.file_selection_tips = {
-            "choose_file": "Click the button to select a file for import.\nFile must be in csv format.",
+            "choose_file": "Click the button to select a file for import.\nFile must be in csv format.\nMany _words.csv and _definitions.csv files can be imported from a folder or a zip archive.",
             "chosen_file_title": "Enter the title and optionally a subtitle.\nYou can also cancel the operation or select a different file.",
         }
         
@@ -110,6 +136,7 @@ class ImportExportControl(ft.Container):
                 self.subtitle_field,
                 self.buttons,
                 self.choose_file_button,
+                self.bulk_import_buttons,
             ],
             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
             alignment=ft.MainAxisAlignment.CENTER,
@@ -123,9 +150,31 @@ class ImportExportControl(ft.Container):
         else:
             self.tiles_of_sets = PageProperties.get_export_body()
             
+        # export of many sets to one zip archive
+        self.export_all_button = ft.TextButton(
+            text="Export all",
+            icon=ft.Icons.ARCHIVE,
+            on_click=lambda e: self.__on_export_archive_click(e, only_selected=False),
+        )
+        
+        self.export_selected_button = ft.TextButton(
+            text="Export selected",
+            icon=ft.Icons.CHECKLIST,
+            on_click=lambda e: self.__on_export_archive_click(e, only_selected=True),
+        )
+        
+        self.export_archive_buttons = ft.Row(
+            [
+                self.export_all_button,
+                self.export_selected_button,
+            ],
+            alignment=ft.MainAxisAlignment.CENTER,
+        )
+            
         self.export_controls = ft.Column(
             [
-                ft.Text("Choose a set to export."),
+                ft.Text("Choose a set to export or select sets to export them as a zip archive."),
+                self.export_archive_buttons,
                 self.tiles_of_sets
             ],
             alignment=ft.MainAxisAlignment.START,
@@ -140,7 +189,14 @@ class ImportExportControl(ft.Container):
         # set id to path picker to be able to find it in the page
         self.csv_file_selector.id = self.path_picker_csv_id
         
+        # select folder or zip dialog for bulk import
+        self.bulk_selector = ft.FilePicker(
+            on_result=self.__on_bulk_selector_result,
+        )
+        self.bulk_selector.id = "path_picker_bulk"
+        
         # attributes involved in validation
+        self.import_session = None
         self.validation_warnings = None
         self.validation_requires_specific_actions = None
         self.validation_has_statistics = None
@@ -173,6 +229,7 @@ class ImportExportControl(ft.Container):
         self.subtitle_field.visible = True
         self.add_set_button.visible = True
         self.cancel_button.visible = True
+        self.bulk_import_buttons.visible = False
         self.__downscale_import_button()
         self.__change_import_button_to_changing_file()
         self.update()
@@ -185,6 +242,7 @@ class ImportExportControl(ft.Container):
         self.subtitle_field.visible = False
         self.add_set_button.visible = False
         self.cancel_button.visible = False
+        self.bulk_import_buttons.visible = True
         self.__upscale_import_button()
         self.__set_import_button_default()
         self.__remove_validation_properties()
@@ -194,6 +252,7 @@ class ImportExportControl(ft.Container):
         self.title_field.disabled = True
         self.subtitle_field.disabled = True
         self.choose_file_button.disabled = True
+        self.bulk_import_buttons.disabled = True
         self.cancel_button.disabled = True
         self.add_set_button.disabled = True
         self.__disable_menu_button()
@@ -203,6 +262,7 @@ class ImportExportControl(ft.Container):
         self.title_field.disabled = False
         self.subtitle_field.disabled = False
         self.choose_file_button.disabled = False
+        self.bulk_import_buttons.disabled = False
         self.cancel_button.disabled = False
         self.add_set_button.disabled = False
         self.__enable_menu_button()
@@ -220,6 +280,158 @@ class ImportExportControl(ft.Container):
         
         self.__disable_all_import_controls()
         
+    def __on_import_folder_click(self, e):
+        if PageProperties.is_navigation_disabled():
+            return
+        
+        self.bulk_selector.get_directory_path(
+            dialog_title="Select folder with sets to import"
+        )
+        
+        self.__disable_all_import_controls()
+        
+    def __on_import_zip_click(self, e):
+        if PageProperties.is_navigation_disabled():
+            return
+        
+        self.bulk_selector.pick_files(
+            allow_multiple=False,
+            allowed_extensions=["zip"],
+            dialog_title="Select zip archive with sets to import"
+        )
+        
+        self.__disable_all_import_controls()
+        
+    def __on_bulk_selector_result(self, e: ft.FilePickerResultEvent):
+        # folder picker returns a path, file picker returns a list of files
+        source_path = e.path if e.path else (e.files[0].path if e.files else None)
+        if source_path is None:
+            self.__enable_all_import_controls()
+            return
+        
+        if not CSVProcessor.validate_files_csv()["is_valid"]:
+            PageProperties.disable_all_navigation_controls()
+            create_alert_dialog(
+                self.page,
+                title="Error",
+                content="Files.csv has been changed.\nPlease, restart the app.",
+                close_button_text="OK",
+            )
+            return
+        
+        report = BulkImportReport(os.path.basename(source_path.rstrip("/\\")), on_done=self.__on_bulk_import_done)
+        self.tabs.disabled = True
+        self.body.content = report
+        self.update()
+        # files are checked in worker processes, the report is updated from this thread
+        self.page.run_thread(self.__run_bulk_import, source_path, report)
+        
+    def __run_bulk_import(self, source_path: str, report: BulkImportReport):
+        importer = BulkImporter(source_path, keep_statistics=True, on_progress=report.show_progress)
+        try:
+            reports = importer.run()
+        except Exception as ex:
+            report.show_error(str(ex))
+            return
+        report.show_result(reports)
+        
+    def __on_bulk_import_done(self, e):
+        self.tabs.disabled = False
+        self.__show_import_controls()
+        self.__enable_all_import_controls()
+        
+    def __on_export_archive_click(self, e, only_selected: bool):
+        if PageProperties.is_navigation_disabled():
+            return
+        
+        file_names = self.tiles_of_sets.file_names_for_export(only_selected)
+        if not file_names:
+            self.page.open(ft.SnackBar(ft.Text("No sets selected." if only_selected else "There are no sets to export.")))
+            return
+        
+        try:
+            picker = PageProperties.get_export_csv_picker()
+        except AssertionError:
+            picker = PageProperties.create_export_csv_picker(self.page)
+        
+        is_windows = self.page.platform == ft.PagePlatform.WINDOWS
+        archive_name = f"learning_sets_{datetime.now():%Y-%m-%d_%H-%M-%S}.zip"
+        
+        def export_callback(picker_result):
+            if not picker_result.path:
+                return  # Selection canceled
+            if is_windows:
+                # the path points directly to the destination file
+                destination_path = picker_result.path
+                if not destination_path.endswith(".zip"):
+                    destination_path += ".zip"
+            else:
+                # the path points to the directory
+                destination_path = os.path.join(picker_result.path, archive_name)
+            self.__start_export_archive(file_names, destination_path)
+        
+        PageProperties.set_export_callback(export_callback)
+        
+        if is_windows:
+            picker.save_file(
+                dialog_title="Choose export location",
+                file_name=archive_name,
+                allowed_extensions=["zip"]
+            )
+        else:
+            picker.get_directory_path(
+                dialog_title="Choose export directory"
+            )
+        self.page.update()
+        
+    def __start_export_archive(self, file_names: list, destination_path: str):
+        status_text = ft.Text(f"0 of {len(file_names)} sets")
+        progress_bar = ft.ProgressBar(value=0, color=ft.Colors.TEAL)
+        progress_dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Exporting..."),
+            content=ft.Column([status_text, progress_bar], tight=True)
+        )
+        self.page.open(progress_dialog)
+        # the archive is written in a thread, so the dialog is updated while sets are compressed
+        self.page.run_thread(self.__run_export_archive, file_names, destination_path, progress_dialog, status_text, progress_bar)
+        
+    def __run_export_archive(self, file_names: list, destination_path: str, progress_dialog, status_text, progress_bar):
+        def on_progress(written_bytes, total_bytes):
+            # the bar is updated only when the visible value changes
+            value = round(written_bytes / total_bytes, 2) if total_bytes else None
+            if value is not None and value != progress_bar.value:
+                progress_bar.value = value
+                progress_bar.update()
+        
+        def on_member(written_members, all_members):
+            # files.csv is the last member of the archive
+            status_text.value = f"{min(written_members, len(file_names))} of {len(file_names)} sets"
+            if not storage.is_file_based:
+                progress_bar.value = written_members / all_members
+            status_text.update()
+            progress_bar.update()
+        
+        storage = StorageBackend.get_active()
+        try:
+            storage.export_archive(file_names, destination_path, on_progress, on_member)
+        except Exception as ex:
+            self.page.close(progress_dialog)
+            create_alert_dialog(
+                self.page,
+                title="Export error",
+                content=f"Failed to export sets:\n{str(ex)}",
+                close_button_text="OK"
+            )
+            return
+        self.page.close(progress_dialog)
+        create_alert_dialog(
+            self.page,
+            title="Export completed",
+            content=f"Successfully exported {len(file_names)} sets to:\n{destination_path}",
+            close_button_text="OK"
+        )
+        
     def __layout_after_adding_set(self):
         self.chosen_file = None
         self.chosen_file_path = None
@@ -257,22 +469,21 @@ class ImportExportControl(ft.Container):
                     
                     def action_function_for_dialog(e): # user checked "Yes"
                         CSVProcessor.save_set_with_no_specific_actions(
-                            self.chosen_file_path,
+                            self.import_session,
                             self.chosen_file,
                             self.title_field.value,
                             self.subtitle_field.value,
-                            True,
-                            True,
+                            True,  # keep_statistics
                         )
                         self.__layout_after_adding_set()
                     
                     def close_action_function_for_dialog(e): # user checked "No"
                         CSVProcessor.save_set_with_no_specific_actions(
-                            self.chosen_file_path,
+                            self.import_session,
                             self.chosen_file,
                             self.title_field.value,
                             self.subtitle_field.value,
-                            False,
+                            False,  # don't keep_statistics
                         )
                         self.__layout_after_adding_set()
                     
@@ -287,11 +498,10 @@ class ImportExportControl(ft.Container):
                     )
                 else:
                     CSVProcessor.save_set_with_no_specific_actions(
-                        self.chosen_file_path,
+                        self.import_session,
                         self.chosen_file,
                         self.title_field.value,
                         self.subtitle_field.value,
-                        False,
                     )
                     self.__layout_after_adding_set()
                         
@@ -299,13 +509,10 @@ class ImportExportControl(ft.Container):
                 if self.validation_has_statistics:
                     def action_function_for_dialog(e):  # user checked "Yes"
                         information = CSVProcessor.save_set_with_specific_actions(
-                            self.chosen_file_path,
+                            self.import_session,
                             self.chosen_file,
                             self.title_field.value,
                             self.subtitle_field.value,
-                            self.validation_data_type,
-                            True,  # has_statistics
-                            self.validation_warnings,
                             True,  # keep_statistics
                         )
                         if information:
@@ -318,13 +525,10 @@ class ImportExportControl(ft.Container):
                     
                     def close_action_function_for_dialog(e):  # user checked "No"
                         information = CSVProcessor.save_set_with_specific_actions(
-                            self.chosen_file_path,
+                            self.import_session,
                             self.chosen_file,
                             self.title_field.value,
                             self.subtitle_field.value,
-                            self.validation_data_type,
-                            True,  # has_statistics
-                            self.validation_warnings,
                             False,  # don't keep_statistics
                         )
                         if information:
@@ -346,13 +550,10 @@ class ImportExportControl(ft.Container):
                     )
                 else:
                     information = CSVProcessor.save_set_with_specific_actions(
-                        self.chosen_file_path,
+                        self.import_session,
                         self.chosen_file,
                         self.title_field.value,
                         self.subtitle_field.value,
-                        self.validation_data_type,
-                        False,  # has_statistics
-                        self.validation_warnings,
                     )
                     if information:
                         create_alert_dialog(
@@ -386,13 +587,16 @@ class ImportExportControl(ft.Container):
     def __user_has_chosen_file(self):
         return self.title_field.visible
     
-    def __set_validation_properties(self, validation_result):
-        self.validation_warnings = validation_result["warnings"]
-        self.validation_requires_specific_actions = validation_result["requires_specific_actions"]
-        self.validation_has_statistics = validation_result["has_statistics"]
-        self.validation_data_type = validation_result["data_type"]
+    def __set_validation_properties(self, import_session):
+        # the session keeps the frame read for validation, the set is saved from it
+        self.import_session = import_session
+        self.validation_warnings = import_session.warnings
+        self.validation_requires_specific_actions = import_session.requires_specific_actions
+        self.validation_has_statistics = import_session.has_statistics
+        self.validation_data_type = import_session.data_type
         
     def __remove_validation_properties(self):
+        self.import_session = None
         self.validation_warnings = None
         self.validation_requires_specific_actions = None
         self.validation_has_statistics = None
@@ -400,13 +604,14 @@ class ImportExportControl(ft.Container):
     
     def __on_csv_file_selector_result(self, e: ft.FilePickerResultEvent):
         if e.files:
-            validation_result = CSVProcessor.validate_file(e.files[0].path)
+            import_session = CSVProcessor.open_import_session(e.files[0].path)
+            validation_result = import_session.validation_result
             
             if validation_result["is_valid"]:
                 self.title_field.value = validation_result["name_suggestion"]
                 self.subtitle_field.value = "" # it will be set by default
                 self.__make_layout_for_chosen_file(e.files[0].name, e.files[0].path)
-                self.__set_validation_properties(validation_result)
+                self.__set_validation_properties(import_session)
             
                 if validation_result["warnings"]:
                     warning_title = "Warnings" if len(validation_result["warnings"]) > 1 else "Warning"
@@ -424,15 +629,15 @@ class ImportExportControl(ft.Container):
         self.__enable_all_import_controls()
     
     def __ensure_csv_selector_in_overlay(self):
-        dialog = self.csv_file_selector                
-        # delete dialog selector from overlay if exists
-        for p in self.page.overlay:
-            if hasattr(p, 'id') and p.id == dialog.id:
-                self.page.overlay.remove(p)
-                break
-            
-        # add dialog selector to overlay
-        self.page.overlay.append(self.csv_file_selector)
+        for dialog in (self.csv_file_selector, self.bulk_selector):
+            # delete dialog selector from overlay if exists
+            for p in self.page.overlay:
+                if hasattr(p, 'id') and p.id == dialog.id:
+                    self.page.overlay.remove(p)
+                    break
+                
+            # add dialog selector to overlay
+            self.page.overlay.append(dialog)
     
     def __on_change_tab_from_import_to_export_delate_search_control(self):
         if self.last_tab_index == 0:
@@ -505,6 +710,7 @@ class ImportExportControl(ft.Container):
             self.import_controls.spacing = 25
             self.__make_default_bottom_appbar_height()
             self.choose_file_button.visible = True
+            self.bulk_import_buttons.visible = not self.__user_has_chosen_file()
             self.__show_first_span_in_text_tip()
             self.update()
             
@@ -515,6 +721,7 @@ class ImportExportControl(ft.Container):
             self.import_controls.spacing = 10
             self.__make_compact_bottom_appbar_height()
             self.choose_file_button.visible = False
+            self.bulk_import_buttons.visible = False
             self.__hide_first_span_in_text_tip()
             self.update()
         
@@ -0,0 +1,129 @@
+import os
+import pandas as pd
+from constants import PartsOfSpeech, WordDefinitions, StatsColumns, Warnings
+
+class ImportSession:
+    """
+    State of importing one CSV file, from its validation to saving it as a set.
+
+    The session keeps the validation result, the frame of the file with the detected index column
+    and masks of rows computed from the frame, so the file is parsed at most once per import.
+    The frame is the one read by the validation if it was read, otherwise it is read on first use.
+    Large files can be read chunk by chunk with iter_frames instead, then the whole frame is never created.
+    """
+    STATISTICS_WARNINGS = [
+        Warnings.COLUMN_NOT_BOOLEAN.value,
+        Warnings.COLUMN_NOT_INTEGER.value,
+        Warnings.EMPTY_VALUES_STATISTICS.value,
+        Warnings.INCONSISTENT_STATISTICS_COMBINATION.value,
+        Warnings.NEGATIVE_CORRECT_ANSWERS.value
+    ]
+
+    def __init__(self, file_path: str, validation_result: dict, frame: pd.DataFrame = None):
+        self.file_path = file_path
+        self.validation_result = validation_result
+        self.__frame = self.__drop_unnamed_column(frame) if frame is not None and validation_result["is_valid"] else None
+        self.__insufficient_rows = None
+
+    # validation result
+    @property
+    def is_valid(self) -> bool:
+        return self.validation_result["is_valid"]
+
+    @property
+    def errors(self) -> list:
+        return self.validation_result["errors"]
+
+    @property
+    def warnings(self) -> list:
+        return self.validation_result["warnings"]
+
+    @property
+    def requires_specific_actions(self) -> bool:
+        return self.validation_result["requires_specific_actions"]
+
+    @property
+    def has_statistics(self) -> bool:
+        return self.validation_result["has_statistics"]
+
+    @property
+    def data_type(self) -> str:
+        return self.validation_result["data_type"]
+
+    @property
+    def name_suggestion(self) -> str:
+        return self.validation_result["name_suggestion"]
+
+    @property
+    def index_present(self) -> bool:
+        # the first column is the index unless the validation has found that it cannot be
+        return Warnings.FIRST_COLUMN_NOT_INDEX.value not in self.warnings
+
+    def has_statistics_warnings(self) -> bool:
+        return any(warning in self.warnings for warning in self.STATISTICS_WARNINGS)
+
+    # data
+    @property
+    def frame(self) -> pd.DataFrame:
+        assert self.is_valid, "Only a valid file can be imported."
+        if self.__frame is None:
+            self.__frame = self.read_frame(self.file_path, self.index_present)
+        return self.__frame
+
+    @staticmethod
+    def read_frame(file_path: str, index_present: bool) -> pd.DataFrame:
+        # the file is read like by the validation, then the first column becomes the index
+        df = pd.read_csv(file_path)
+        if index_present:
+            df = df.set_index(df.columns[0])
+        return ImportSession.__drop_unnamed_column(df)
+
+    @staticmethod
+    def __drop_unnamed_column(df: pd.DataFrame) -> pd.DataFrame:
+        # Remove any 'Unnamed: 0' columns if they exist
+        if 'Unnamed: 0' in df.columns:
+            df = df.drop(columns=['Unnamed: 0'])
+        return df
+
+    def insufficient_rows_mask(self, df: pd.DataFrame = None) -> pd.Series:
+        """
+        Returns the mask of rows without enough values in typical columns of the data type.
+        The mask of the whole frame is computed once, the mask of another frame (e.g. a chunk) every time.
+        """
+        if df is not None:
+            return self.__insufficient_rows_mask(df)
+        if self.__insufficient_rows is None:
+            self.__insufficient_rows = self.__insufficient_rows_mask(self.frame)
+        return self.__insufficient_rows
+
+    def __insufficient_rows_mask(self, df: pd.DataFrame) -> pd.Series:
+        if self.data_type == "words":
+            typical_columns = [col.value for col in PartsOfSpeech]
+        elif self.data_type == "definitions":
+            typical_columns = [col.value for col in WordDefinitions]
+        else:
+            raise ValueError(f"data_type {self.data_type} is not implemented")
+        return df[typical_columns].isnull().sum(axis=1) >= (len(typical_columns) - 1)
+
+    def statistics_columns(self, df: pd.DataFrame = None) -> list:
+        df = self.frame if df is None else df
+        return [col.value for col in StatsColumns if col.value in df.columns]
+
+    # chunked reading
+    def should_read_in_chunks(self, min_bytes: int) -> bool:
+        # a frame already read by the validation is used as it is
+        return self.__frame is None and os.path.getsize(self.file_path) > min_bytes
+
+    def iter_frames(self, chunksize: int):
+        """Yields frames of consecutive rows of the file, each read like by read_frame."""
+        assert self.is_valid, "Only a valid file can be imported."
+        with pd.read_csv(self.file_path, chunksize=chunksize) as reader:
+            for chunk in reader:
+                if self.index_present:
+                    chunk = chunk.set_index(chunk.columns[0])
+                yield self.__drop_unnamed_column(chunk)
+
+    def close(self):
+        # the frame is not needed after the set has been saved
+        self.__frame = None
+        self.__insufficient_rows = None
@@ -0,0 +1,65 @@
+import bisect
+import random as rd
+
+class IndexBucket:
+    """
+    Set of row indexes which are in the same learning state, ordered by the number of correct answers.
+
+    Indexes are grouped by correct_answers and the distinct numbers of correct answers are kept sorted,
+    so taking the indexes with the fewest correct answers does not scan the whole bucket.
+    Adding and removing an index is O(1) apart from the rare insertion of a new number of correct answers.
+    """
+
+    def __init__(self):
+        self.__groups = {} # correct_answers -> dict used as an ordered set of indexes
+        self.__keys = [] # sorted numbers of correct answers which have a group
+        # indexes in a list with their positions, it allows to sample and remove in O(1)
+        self.__indexes = []
+        self.__positions = {}
+
+    def __len__(self):
+        return len(self.__indexes)
+
+    def __contains__(self, index):
+        return index in self.__positions
+
+    def add(self, index, correct_answers: int):
+        group = self.__groups.get(correct_answers)
+        if group is None:
+            group = self.__groups[correct_answers] = {}
+            bisect.insort(self.__keys, correct_answers)
+        group[index] = None
+
+        self.__positions[index] = len(self.__indexes)
+        self.__indexes.append(index)
+
+    def remove(self, index, correct_answers: int):
+        group = self.__groups[correct_answers]
+        del group[index]
+        if not group:
+            del self.__groups[correct_answers]
+            self.__keys.pop(bisect.bisect_left(self.__keys, correct_answers))
+
+        # the last index takes the place of the removed one
+        position = self.__positions.pop(index)
+        last = self.__indexes.pop()
+        if position < len(self.__indexes):
+            self.__indexes[position] = last
+            self.__positions[last] = position
+
+    def all(self) -> list:
+        return list(self.__indexes)
+
+    def smallest(self, qty: int) -> list:
+        # Returns up to qty indexes with the fewest correct answers.
+        result = []
+        for key in self.__keys:
+            for index in self.__groups[key]:
+                if len(result) == qty:
+                    return result
+                result.append(index)
+        return result
+
+    def sample(self, qty: int) -> list:
+        # Returns qty random indexes, qty must not be greater than the size of the bucket.
+        return [self.__indexes[position] for position in rd.sample(range(len(self.__indexes)), qty)]
@@ -1,6 +1,6 @@
 import flet as ft
 from PageProperties import PageProperties
-from constants import MAX_ROWS
+from constants import MAX_ROWS, MAX_ROWS_LARGE_SETS
  
 class InfoControl(ft.Container):
     MD_TEXT = f"""
@@ -65,7 +65,7 @@ These files contain definitions and their corresponding words:
 - `word`: corresponding word
 
 ### File Size Limitation
-Each learning set cannot contain more than {MAX_ROWS} items. Files with more rows than this limit cannot be imported, and you cannot create sets larger than this value.
+Each learning set cannot contain more than {MAX_ROWS} items. Files with more rows than this limit cannot be imported, and you cannot create sets larger than this value. After enabling large sets in the settings, the limit is {MAX_ROWS_LARGE_SETS} items.
 
 ### Statistics Columns (Optional)
 Both file types can include statistics columns, which were previously mentioned and are used to track learning progress:
@@ -1,6 +1,10 @@
 import flet as ft 
 from TilesContainer import TilesContainer
 from PageProperties import PageProperties 
+from StorageBackend import StorageBackend
+from CardIndex import CardIndex
+from constants import SEARCH_DEBOUNCE_SECONDS
+import threading
 
 class SearchControl(ft.Row):
     COLOR = ft.Colors.CYAN
@@ -10,6 +14,10 @@ class SearchControl(ft.Row):
         self.page = page
         self.tiles_container = tiles_container
         
+        self.search_timer = None
+        # in this mode the pattern is searched in cards of all sets instead of titles of sets
+        self.card_search_mode = False
+        
         self.vertical_alignment = ft.CrossAxisAlignment.CENTER
         self.tight = True
         self.search_field = ft.TextField(
@@ -33,6 +41,14 @@ class SearchControl(ft.Row):
             icon_color=self.COLOR
         )
         
+        self.card_search_button = ft.IconButton(
+            icon=ft.Icons.MANAGE_SEARCH,
+            on_click=self.on_card_search_click,
+            icon_color=self.COLOR,
+            tooltip="Search in cards",
+            visible=not tiles_container.export_mode
+        )
+        
         self.close_button = ft.IconButton(
             icon=ft.Icons.CLOSE,
             on_click=self.on_close_click,
@@ -43,6 +59,7 @@ class SearchControl(ft.Row):
             self.search_field,
             self.next_pattern_button,
             self.previous_pattern_button,
+            self.card_search_button,
             self.close_button
         ])
         
@@ -52,6 +69,22 @@ class SearchControl(ft.Row):
     def on_previous_pattern_click(self, e):
         self.tiles_container.scroll_to_previous()
         
+    def on_card_search_click(self, e):
+        self.card_search_mode = not self.card_search_mode
+        self.card_search_button.selected = self.card_search_mode
+        self.card_search_button.icon_color = ft.Colors.ORANGE if self.card_search_mode else self.COLOR
+        self.next_pattern_button.disabled = self.card_search_mode
+        self.previous_pattern_button.disabled = self.card_search_mode
+        self.search_field.label = "Search in cards" if self.card_search_mode else "Search"
+        if self.card_search_mode:
+            self.tiles_container.reset_indications()
+            self.tiles_container.turn_off_searching_mode()
+        else:
+            self.tiles_container.show_tiles()
+            self.tiles_container.trigger_searching_mode()
+        self.update()
+        self.change_text_field(e)
+        
     def on_close_click(self, e):
         if not self.tiles_container.export_mode:
             TilesContainer().back_to_main_menu(e)
@@ -78,13 +111,42 @@ class SearchControl(ft.Row):
             import_export_control.scale_height_to_page(0.55)
                 
     def change_text_field(self, e):
-        pattern = self.search_field.value
-        self.tiles_container.indicate_patterns_and_scroll_to_first(pattern)         
+        # the search starts when typing pauses, a new keystroke cancels the waiting and the running search
+        generation = self.tiles_container.new_search_generation()
+        self.__cancel_search_timer()
+        self.search_timer = threading.Timer(
+            SEARCH_DEBOUNCE_SECONDS,
+            self.__search,
+            args=(self.search_field.value or "", generation, self.card_search_mode)
+        )
+        self.search_timer.daemon = True
+        self.search_timer.start()
+        
+    def __search(self, pattern: str, generation: int, in_cards: bool):
+        if not in_cards:
+            self.tiles_container.indicate_patterns_and_scroll_to_first(pattern, generation)
+            return
+        if not pattern.strip():
+            self.tiles_container.show_tiles()
+            return
+        # sets saved before the index existed or changed outside the app are indexed, other sets are only checked
+        CardIndex.synchronize(StorageBackend.get_active())
+        # only the index is read, sets are not opened
+        self.tiles_container.show_card_results(CardIndex.search(pattern), generation)
+        
+    def __cancel_search_timer(self):
+        if self.search_timer is not None:
+            self.search_timer.cancel()
+            self.search_timer = None
                 
     def did_mount(self):
         self.tiles_container.trigger_searching_mode()
         
     def will_unmount(self):
+        self.__cancel_search_timer()
+        if self.card_search_mode:
+            # the container may be removed from the page with the search, it is updated when it is shown again
+            self.tiles_container.show_tiles(update=False)
         self.tiles_container.turn_off_searching_mode()
         
     def close_but_in_export_mode(self):
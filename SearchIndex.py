@@ -0,0 +1,105 @@
+import unicodedata
+
+class SearchIndex:
+    """
+    Index of titles and subtitles of sets for the search of sets.
+
+    Texts are kept normalized (casefolded, without accents) with a map from every normalized character
+    to its position in the original text, which is used to highlight matches. Every trigram of a text
+    has a posting set of keys, so a pattern of three or more characters is checked only in texts
+    containing all of its trigrams. update() indexes again only entries whose texts have changed.
+    Results are keys in the order of the entries given to update().
+    """
+    def __init__(self):
+        self.__texts = {} # key -> original texts of fields
+        self.__documents = {} # key -> (normalized text, map to original positions) of fields
+        self.__joined = {} # key -> normalized texts of fields joined by a character which is never searched
+        self.__postings = {} # trigram -> set of keys
+        self.__positions = {} # key -> position of the entry
+        self.__keys = []
+
+    @staticmethod
+    def normalize(text: str) -> tuple:
+        """Returns the casefolded text without accents and positions of its characters in the original text."""
+        if text.isascii():
+            return text.lower(), range(len(text))
+        chars = []
+        char_map = []
+        for position, char in enumerate(text):
+            for normalized_char in unicodedata.normalize("NFKD", char.casefold()):
+                if not unicodedata.combining(normalized_char):
+                    chars.append(normalized_char)
+                    char_map.append(position)
+        return "".join(chars), char_map
+
+    @staticmethod
+    def __trigrams(text: str) -> set:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def update(self, entries: list):
+        """Replaces the indexed entries with (key, title, subtitle) tuples."""
+        keys = set()
+        for key, *texts in entries:
+            keys.add(key)
+            texts = tuple(text or "" for text in texts)
+            if self.__texts.get(key) == texts:
+                continue
+            self.__remove(key)
+            self.__add(key, texts)
+        for key in [key for key in self.__texts if key not in keys]:
+            self.__remove(key)
+        self.__keys = [entry[0] for entry in entries]
+        self.__positions = {key: position for position, key in enumerate(self.__keys)}
+
+    def __add(self, key, texts: tuple):
+        self.__texts[key] = texts
+        self.__documents[key] = tuple(self.normalize(text) for text in texts)
+        self.__joined[key] = "\0".join(normalized for normalized, _ in self.__documents[key])
+        for normalized, _ in self.__documents[key]:
+            for trigram in self.__trigrams(normalized):
+                self.__postings.setdefault(trigram, set()).add(key)
+
+    def __remove(self, key):
+        if key not in self.__texts:
+            return
+        for normalized, _ in self.__documents.pop(key):
+            for trigram in self.__trigrams(normalized):
+                postings = self.__postings.get(trigram)
+                if postings is not None:
+                    postings.discard(key)
+                    if not postings:
+                        del self.__postings[trigram]
+        del self.__texts[key]
+        del self.__joined[key]
+
+    def search(self, pattern: str) -> list:
+        """Returns keys of entries whose title or subtitle contains the pattern, in the order of entries."""
+        pattern = self.normalize(pattern)[0]
+        if not pattern:
+            return list(self.__keys)
+        trigrams = self.__trigrams(pattern)
+        if not trigrams:
+            # short patterns are checked in all texts
+            return [key for key in self.__keys if pattern in self.__joined[key]]
+        # the smallest posting sets are intersected first
+        postings = sorted((self.__postings.get(trigram, set()) for trigram in trigrams), key=len)
+        candidates = set.intersection(*postings)
+        if len(candidates) * 8 > len(self.__keys):
+            # for many candidates one pass over entries in their order is faster than sorting
+            return [key for key in self.__keys if key in candidates and pattern in self.__joined[key]]
+        keys = [key for key in candidates if pattern in self.__joined[key]]
+        return sorted(keys, key=self.__positions.__getitem__)
+
+    def spans(self, key, pattern: str) -> tuple:
+        """Returns lists of (start, end) spans of the pattern in the original title and subtitle of the entry."""
+        pattern = self.normalize(pattern)[0]
+        result = []
+        for normalized, char_map in self.__documents[key]:
+            spans = []
+            start = normalized.find(pattern) if pattern else -1
+            while start != -1:
+                end = start + len(pattern)
+                spans.append((char_map[start], char_map[end - 1] + 1))
+                start = normalized.find(pattern, end)
+            result.append(spans)
+        return tuple(result)
@@ -0,0 +1,79 @@
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+from constants import SET_CACHE_MAX_BYTES
+
+class SetCache:
+    """
+    Process-wide cache of parsed set files.
+
+    Entries are keyed by the full path and are valid as long as the size and the modification time
+    of the file do not change. The least recently used entries are evicted when the cache exceeds
+    its memory budget. Copies are returned, so callers can modify the data freely.
+    """
+    max_bytes = SET_CACHE_MAX_BYTES
+    _entries = OrderedDict() # path -> (size, mtime_ns, data, nbytes)
+    _total_bytes = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def __fingerprint(path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    @classmethod
+    def get(cls, path: str):
+        """Returns a copy of the cached data or None if the file is not cached or has changed."""
+        fingerprint = cls.__fingerprint(path)
+        with cls._lock:
+            entry = cls._entries.get(path)
+            if entry is None:
+                return None
+            if fingerprint is None or entry[:2] != fingerprint:
+                cls.__remove(path)
+                return None
+            cls._entries.move_to_end(path)
+            return entry[2].copy()
+
+    @classmethod
+    def put(cls, path: str, data: pd.DataFrame):
+        """Stores a copy of the data which is the current content of the file."""
+        fingerprint = cls.__fingerprint(path)
+        if fingerprint is None:
+            return
+        nbytes = int(data.memory_usage(index=True, deep=True).sum())
+        with cls._lock:
+            cls.__remove(path)
+            if nbytes > cls.max_bytes:
+                return
+            cls._entries[path] = (*fingerprint, data.copy(), nbytes)
+            cls._total_bytes += nbytes
+            cls.__evict()
+
+    @classmethod
+    def invalidate(cls, path: str):
+        with cls._lock:
+            cls.__remove(path)
+
+    @classmethod
+    def set_max_bytes(cls, max_bytes: int):
+        with cls._lock:
+            cls.max_bytes = max_bytes
+            cls.__evict()
+
+    @classmethod
+    def __remove(cls, path: str):
+        entry = cls._entries.pop(path, None)
+        if entry is not None:
+            cls._total_bytes -= entry[3]
+
+    @classmethod
+    def __evict(cls):
+        # removes the least recently used entries until the cache fits in the memory budget
+        while cls._total_bytes > cls.max_bytes and cls._entries:
+            path = next(iter(cls._entries))
+            cls.__remove(path)
@@ -0,0 +1,20 @@
+from constants import MAX_ROWS, MAX_ROWS_LARGE_SETS
+
+class SetLimits:
+    """
+    Limits of learning sets, they depend on the large sets mode which is switched in the settings.
+    """
+    STORAGE_KEY = "large_sets"
+    large_sets = False
+
+    @classmethod
+    def set_large_sets(cls, enabled: bool):
+        cls.large_sets = enabled
+
+    @classmethod
+    def set_large_sets_from_page(cls, page):
+        cls.large_sets = bool(page.client_storage.get(cls.STORAGE_KEY))
+
+    @classmethod
+    def get_max_rows(cls) -> int:
+        return MAX_ROWS_LARGE_SETS if cls.large_sets else MAX_ROWS
@@ -0,0 +1,184 @@
+import csv
+import os
+import tempfile
+import threading
+import pandas as pd
+from constants import FilesColumns
+
+class SetRegistry:
+    """
+    In-memory index of files.csv keyed by file name.
+
+    The file is parsed once and parsed again only when its size or modification time changes
+    (e.g. it was edited outside the app). Every mutation is written through to the file atomically.
+    A file without the required columns is not overwritten by mutations, only by reset() and replace_data().
+    """
+    COLUMNS = [
+        FilesColumns.FILE_NAME.value,
+        FilesColumns.TITLE.value,
+        FilesColumns.SUBTITLE.value
+    ]
+    # columns with the cached summary of sets, they are optional in files.csv
+    SUMMARY_COLUMNS = {
+        FilesColumns.KIND.value: str,
+        FilesColumns.ROWS.value: int,
+        FilesColumns.KNOWN.value: int,
+        FilesColumns.LEARNING.value: int,
+        FilesColumns.TO_LEARN.value: int,
+        FilesColumns.LAST_STUDIED.value: str,
+        FilesColumns.SIZE.value: int,
+        FilesColumns.MTIME.value: int
+    }
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.RLock()
+        self.__entries = {} # file_name -> entry, in the order of files.csv
+        self.__data = None # DataFrame as parsed from files.csv, it is used for validation
+        self.__fingerprint = None
+        self.__version = 0 # it is increased on every change of the entries
+        self.__is_loaded_cleanly = True # False when files.csv lacks required columns, its entries are not known
+
+    def __current_fingerprint(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def __ensure_loaded(self):
+        fingerprint = self.__current_fingerprint()
+        if fingerprint is None:
+            self.reset()
+            return
+        if fingerprint == self.__fingerprint:
+            return
+
+        # modification times in nanoseconds do not fit into floats, which pandas uses for columns with empty values
+        data = pd.read_csv(self.path, dtype={FilesColumns.SIZE.value: "Int64", FilesColumns.MTIME.value: "Int64"})
+        entries = {}
+        self.__is_loaded_cleanly = all(col in data.columns for col in self.COLUMNS)
+        if self.__is_loaded_cleanly:
+            summary_columns = [col for col in self.SUMMARY_COLUMNS if col in data.columns]
+            for row in data[self.COLUMNS + summary_columns].to_dict("records"):
+                file_name = row[FilesColumns.FILE_NAME.value]
+                if pd.isna(file_name) or str(file_name) in entries:
+                    continue # invalid entries are reported by CSVProcessor.validate_files_csv
+                entry = self.__empty_entry(str(file_name), row[FilesColumns.TITLE.value], row[FilesColumns.SUBTITLE.value])
+                for col in summary_columns:
+                    if not pd.isna(row[col]):
+                        entry[col] = self.SUMMARY_COLUMNS[col](row[col])
+                entries[entry[FilesColumns.FILE_NAME.value]] = entry
+        self.__data = data
+        self.__entries = entries
+        self.__fingerprint = fingerprint
+        self.__version += 1
+
+    def __empty_entry(self, file_name: str, title: str, subtitle: str) -> dict:
+        entry = {
+            FilesColumns.FILE_NAME.value: file_name,
+            FilesColumns.TITLE.value: "" if pd.isna(title) else title,
+            FilesColumns.SUBTITLE.value: "" if pd.isna(subtitle) else subtitle
+        }
+        entry.update({col: None for col in self.SUMMARY_COLUMNS})
+        return entry
+
+    def __write(self):
+        # entries of a file which was not loaded cleanly are empty, writing them would destroy its content
+        if not self.__is_loaded_cleanly:
+            raise Exception("files.csv lacks required columns, it has to be repaired before sets can be changed.")
+        # the new content is written to a temporary file which then replaces files.csv
+        directory = os.path.dirname(self.path) or "."
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".files", suffix=".csv")
+        try:
+            with os.fdopen(fd, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=self.COLUMNS + list(self.SUMMARY_COLUMNS), extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(self.__entries.values())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.__data = None # it is created from the entries when it is needed
+        self.__fingerprint = self.__current_fingerprint()
+        self.__version += 1
+
+    def get_data(self) -> pd.DataFrame:
+        """Returns a copy of files.csv as parsed by pandas. Raises an exception if the file cannot be parsed."""
+        with self.lock:
+            self.__ensure_loaded()
+            if self.__data is None:
+                self.__data = pd.DataFrame(list(self.__entries.values()), columns=self.COLUMNS + list(self.SUMMARY_COLUMNS))
+            return self.__data.copy()
+
+    def version(self) -> int:
+        """Returns a number which changes with every change of the entries, also when files.csv is changed outside the app."""
+        with self.lock:
+            self.__ensure_loaded()
+            return self.__version
+
+    def list_entries(self) -> list:
+        with self.lock:
+            self.__ensure_loaded()
+            return [entry.copy() for entry in self.__entries.values()]
+
+    def file_names(self) -> list:
+        with self.lock:
+            self.__ensure_loaded()
+            return list(self.__entries.keys())
+
+    def contains(self, file_name: str) -> bool:
+        with self.lock:
+            self.__ensure_loaded()
+            return os.path.basename(file_name) in self.__entries
+
+    def add(self, file_name: str, title: str, subtitle: str = ""):
+        file_name = os.path.basename(file_name)
+        with self.lock:
+            self.__ensure_loaded()
+            self.__entries[file_name] = self.__empty_entry(file_name, title, subtitle)
+            self.__write()
+
+    def add_many(self, entries: list):
+        """Adds entries (dictionaries with FilesColumns keys, summaries are optional) and writes the file once."""
+        with self.lock:
+            self.__ensure_loaded()
+            for entry in entries:
+                file_name = os.path.basename(entry[FilesColumns.FILE_NAME.value])
+                new_entry = self.__empty_entry(file_name, entry[FilesColumns.TITLE.value], entry.get(FilesColumns.SUBTITLE.value, ""))
+                new_entry.update({col: entry[col] for col in self.SUMMARY_COLUMNS if entry.get(col) is not None})
+                self.__entries[file_name] = new_entry
+            self.__write()
+
+    def update_summary(self, file_name: str, summary: dict, write: bool = True):
+        """Updates the cached summary of a registered set. With write=False only the memory is updated."""
+        with self.lock:
+            self.__ensure_loaded()
+            entry = self.__entries.get(os.path.basename(file_name))
+            if entry is None:
+                return
+            entry.update({col: value for col, value in summary.items() if col in self.SUMMARY_COLUMNS})
+            if write:
+                self.__write()
+            else:
+                self.__version += 1
+
+    def remove(self, file_name: str):
+        with self.lock:
+            self.__ensure_loaded()
+            self.__entries.pop(os.path.basename(file_name), None)
+            self.__write()
+
+    def replace_data(self, data: pd.DataFrame):
+        """Replaces the whole content of files.csv, it is used by the repair of the file."""
+        with self.lock:
+            data.to_csv(self.path, index=False)
+            self.__fingerprint = None
+            self.__ensure_loaded()
+
+    def reset(self):
+        with self.lock:
+            self.__entries = {}
+            self.__is_loaded_cleanly = True # the whole file is replaced
+            self.__write()
@@ -1,6 +1,8 @@
 import flet as ft
 from PageProperties import PageProperties
 from page_functions import set_theme_from_bgcolor
+from SetLimits import SetLimits
+from constants import MAX_ROWS_LARGE_SETS
 
 class BackgroundShadeSlider(ft.Column):
     DARK_THEME_COLORS = [
@@ -85,10 +87,18 @@ class SettingsControl(ft.Column):
             initial_value=initial_value,
         )
         
+        # large sets switch
+        self.large_sets_switch = ft.Switch(
+            label=f"Large sets (up to {MAX_ROWS_LARGE_SETS} items)",
+            value=SetLimits.large_sets,
+            on_change=self.on_large_sets_change
+        )
+        
         # Add elements in column to container
         self.controls = [
             self.theme_dropdown,
-            self.background_shade_slider
+            self.background_shade_slider,
+            self.large_sets_switch
         ]
         
         self.__update_controls_width()
@@ -117,6 +127,10 @@ class SettingsControl(ft.Column):
         self.page.update()
         self.background_shade_slider.update_slider_position()
     
+    def on_large_sets_change(self, e):
+        SetLimits.set_large_sets(e.control.value)
+        self.page.client_storage.set(SetLimits.STORAGE_KEY, e.control.value)
+    
     def did_mount(self):
         appbar = self.page.appbar
         appbar.leading = self.menu_button
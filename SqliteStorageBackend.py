@@ -0,0 +1,268 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from constants import FilesColumns, StatsColumns, PartsOfSpeech, WordDefinitions
+from FilePathManager import FilePathManager
+from StorageBackend import StorageBackend, CsvStorageBackend
+from CardIndex import CardIndex
+
+class SqliteStorageBackend(StorageBackend):
+    """
+    Keeps all sets and the registry of sets in one SQLite database (WAL mode).
+
+    Answers are saved as single-row UPDATEs and listing sets is one query over the files table.
+    On the first start, sets registered in files.csv are copied into the database.
+    """
+    is_file_based = False
+
+    FILES_TABLE = "files"
+    CARDS_TABLE = "cards"
+    SCHEMA_VERSION = 2
+    WORDS_COLUMNS = [col.value for col in PartsOfSpeech]
+    DEFINITIONS_COLUMNS = [col.value for col in WordDefinitions]
+    # summary of sets kept in the files table, version 2 of the schema
+    SUMMARY_COLUMNS = {
+        FilesColumns.KIND.value: "TEXT",
+        FilesColumns.ROWS.value: "INTEGER",
+        FilesColumns.KNOWN.value: "INTEGER",
+        FilesColumns.LEARNING.value: "INTEGER",
+        FilesColumns.TO_LEARN.value: "INTEGER",
+        FilesColumns.LAST_STUDIED.value: "TEXT",
+        FilesColumns.SIZE.value: "INTEGER",
+        FilesColumns.MTIME.value: "INTEGER"
+    }
+    STATS_COLUMNS = [
+        StatsColumns.CORRECT_ANSWERS.value,
+        StatsColumns.GOOD_ANSWERS_IN_A_ROW.value,
+        StatsColumns.GOOD_ANSWER.value,
+        StatsColumns.WORD_TO_LEARN.value
+    ]
+
+    def __init__(self, database_path: str = None):
+        self.database_path = database_path or FilePathManager.get_database_path()
+        self.lock = threading.Lock()
+        # flet calls event handlers from different threads, access is serialized by the lock
+        self.connection = sqlite3.connect(self.database_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.__create_schema()
+
+    def __create_schema(self):
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+
+        card_columns = ", ".join(f"{col} TEXT" for col in self.WORDS_COLUMNS + self.DEFINITIONS_COLUMNS)
+        with self.lock, self.connection:
+            self.connection.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.FILES_TABLE} (
+                    position INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {FilesColumns.FILE_NAME.value} TEXT NOT NULL UNIQUE,
+                    {FilesColumns.TITLE.value} TEXT NOT NULL,
+                    {FilesColumns.SUBTITLE.value} TEXT NOT NULL DEFAULT ''
+                )""")
+            self.connection.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.CARDS_TABLE} (
+                    file_name TEXT NOT NULL,
+                    row_index INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    {card_columns},
+                    {StatsColumns.CORRECT_ANSWERS.value} INTEGER NOT NULL DEFAULT 0,
+                    {StatsColumns.GOOD_ANSWERS_IN_A_ROW.value} INTEGER NOT NULL DEFAULT 0,
+                    {StatsColumns.GOOD_ANSWER.value} INTEGER NOT NULL DEFAULT 0,
+                    {StatsColumns.WORD_TO_LEARN.value} INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (file_name, row_index)
+                ) WITHOUT ROWID""")
+            if version < 2:
+                existing = {row[1] for row in self.connection.execute(f"PRAGMA table_info({self.FILES_TABLE})")}
+                for col, col_type in self.SUMMARY_COLUMNS.items():
+                    if col not in existing:
+                        self.connection.execute(f"ALTER TABLE {self.FILES_TABLE} ADD COLUMN {col} {col_type}")
+            self.connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+        if version == 0:
+            self.__import_csv_files()
+        if version < 2:
+            self.__compute_summaries()
+
+    def __import_csv_files(self):
+        # copies sets from the CSV storage which was used before the database existed
+        if not os.path.exists(FilePathManager.get_files_data_path()):
+            return
+        csv_backend = CsvStorageBackend()
+        for entry in csv_backend.list_files():
+            file_name = entry[FilesColumns.FILE_NAME.value]
+            if not csv_backend.set_exists(file_name):
+                continue
+            self.save_set(csv_backend.load_set(file_name), file_name)
+            self.add_file(file_name, entry[FilesColumns.TITLE.value], entry[FilesColumns.SUBTITLE.value])
+            self.update_set_summary(file_name, {FilesColumns.LAST_STUDIED.value: entry.get(FilesColumns.LAST_STUDIED.value)})
+
+    def __compute_summaries(self):
+        # sets saved before the summary columns existed get their summaries once
+        from AppData import compute_set_summary
+        for entry in self.list_files():
+            file_name = entry[FilesColumns.FILE_NAME.value]
+            self.update_set_summary(file_name, compute_set_summary(self.load_set(file_name), file_name))
+
+    def __typical_columns(self, file_name: str) -> list:
+        if file_name.endswith("_words.csv"):
+            return self.WORDS_COLUMNS
+        elif file_name.endswith("_definitions.csv"):
+            return self.DEFINITIONS_COLUMNS
+        raise Exception("The file_name must end with _words.csv or _definitions.csv.")
+
+    # sets
+    def load_set(self, file_name: str) -> pd.DataFrame:
+        file_name = os.path.basename(file_name)
+        columns = self.__typical_columns(file_name) + self.STATS_COLUMNS
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT row_index, {', '.join(columns)} FROM {self.CARDS_TABLE} WHERE file_name = ? ORDER BY position",
+                (file_name,)
+            ).fetchall()
+
+        data = pd.DataFrame.from_records(rows, columns=["row_index"] + columns).set_index("row_index")
+        data.index.name = None
+        # empty values are NaN, like in sets loaded from CSV files
+        text_columns = columns[:-len(self.STATS_COLUMNS)]
+        data[text_columns] = data[text_columns].where(data[text_columns].notna(), np.nan)
+        data[StatsColumns.CORRECT_ANSWERS.value] = data[StatsColumns.CORRECT_ANSWERS.value].astype(int)
+        for col in self.STATS_COLUMNS[1:]:
+            data[col] = data[col].astype(bool)
+        return data
+
+    def __stats_values(self, row) -> tuple:
+        return (int(row[StatsColumns.CORRECT_ANSWERS.value]),) + tuple(int(bool(row[col])) for col in self.STATS_COLUMNS[1:])
+
+    def __insert_cards(self, data: pd.DataFrame, file_name: str, first_position: int = 0):
+        # it is called in a transaction
+        columns = [col for col in self.__typical_columns(file_name) if col in data.columns]
+        records = []
+        for position, (index, row) in enumerate(data.iterrows(), start=first_position):
+            text_values = tuple(None if pd.isna(row[col]) else str(row[col]) for col in columns)
+            records.append((file_name, int(index), position) + text_values + self.__stats_values(row))
+
+        all_columns = ["file_name", "row_index", "position"] + columns + self.STATS_COLUMNS
+        placeholders = ", ".join("?" for _ in all_columns)
+        self.connection.executemany(
+            f"INSERT INTO {self.CARDS_TABLE} ({', '.join(all_columns)}) VALUES ({placeholders})",
+            records
+        )
+
+    def save_set(self, data: pd.DataFrame, file_name: str):
+        file_name = os.path.basename(file_name)
+        with self.lock, self.connection:
+            self.connection.execute(f"DELETE FROM {self.CARDS_TABLE} WHERE file_name = ?", (file_name,))
+            self.__insert_cards(data, file_name)
+        self.__update_card_index(file_name, data)
+
+    def save_set_in_chunks(self, chunks, file_name: str):
+        # all chunks are inserted in one transaction, so the set is replaced at once
+        file_name = os.path.basename(file_name)
+        try:
+            with self.lock, self.connection:
+                self.connection.execute(f"DELETE FROM {self.CARDS_TABLE} WHERE file_name = ?", (file_name,))
+                position = 0
+                for chunk in CardIndex.index_chunks(file_name, chunks):
+                    self.__insert_cards(chunk, file_name, position)
+                    position += len(chunk)
+        except BaseException:
+            # the transaction is rolled back, so cards indexed on the way are indexed again by CardIndex.synchronize
+            CardIndex.discard_set(file_name)
+            raise
+
+    def save_answer(self, data: pd.DataFrame, file_name: str, index: int):
+        assignments = ", ".join(f"{col} = ?" for col in self.STATS_COLUMNS)
+        with self.lock, self.connection:
+            self.connection.execute(
+                f"UPDATE {self.CARDS_TABLE} SET {assignments} WHERE file_name = ? AND row_index = ?",
+                self.__stats_values(data.loc[index]) + (os.path.basename(file_name), int(index))
+            )
+
+    def flush_answers(self, data: pd.DataFrame, file_name: str):
+        # every answer is committed by save_answer
+        pass
+
+    def set_exists(self, file_name: str) -> bool:
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT 1 FROM {self.FILES_TABLE} WHERE {FilesColumns.FILE_NAME.value} = ?",
+                (os.path.basename(file_name),)
+            ).fetchone()
+        return row is not None
+
+    # registry of sets
+    def registry_version(self):
+        # the database is changed only through this connection, so its number of changed rows is enough
+        with self.lock:
+            return self.connection.total_changes
+
+    def has_file(self, file_name: str) -> bool:
+        return self.set_exists(file_name)
+
+    def create_empty_registry(self):
+        with self.lock, self.connection:
+            self.connection.execute(f"DELETE FROM {self.FILES_TABLE}")
+
+    def list_files(self) -> list:
+        columns = [FilesColumns.FILE_NAME.value, FilesColumns.TITLE.value, FilesColumns.SUBTITLE.value] + list(self.SUMMARY_COLUMNS)
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(columns)} FROM {self.FILES_TABLE} ORDER BY position"
+            ).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def add_file(self, file_name: str, title: str, subtitle: str = ""):
+        with self.lock, self.connection:
+            self.connection.execute(
+                f"""INSERT OR REPLACE INTO {self.FILES_TABLE}
+                    ({FilesColumns.FILE_NAME.value}, {FilesColumns.TITLE.value}, {FilesColumns.SUBTITLE.value})
+                    VALUES (?, ?, ?)""",
+                (os.path.basename(file_name), title, subtitle or "")
+            )
+
+    def add_files(self, entries: list):
+        # all sets are registered in one transaction
+        columns = [FilesColumns.FILE_NAME.value, FilesColumns.TITLE.value, FilesColumns.SUBTITLE.value] + list(self.SUMMARY_COLUMNS)
+        placeholders = ", ".join("?" for _ in columns)
+        records = [
+            (os.path.basename(entry[FilesColumns.FILE_NAME.value]), entry[FilesColumns.TITLE.value], entry.get(FilesColumns.SUBTITLE.value) or "")
+            + tuple(entry.get(col) for col in self.SUMMARY_COLUMNS)
+            for entry in entries
+        ]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {self.FILES_TABLE} ({', '.join(columns)}) VALUES ({placeholders})",
+                records
+            )
+
+    def update_set_summary(self, file_name: str, summary: dict, persist: bool = True):
+        # one UPDATE of a small row is cheap, so the summary is always written
+        columns = [col for col in summary if col in self.SUMMARY_COLUMNS]
+        if not columns:
+            return
+        assignments = ", ".join(f"{col} = ?" for col in columns)
+        with self.lock, self.connection:
+            self.connection.execute(
+                f"UPDATE {self.FILES_TABLE} SET {assignments} WHERE {FilesColumns.FILE_NAME.value} = ?",
+                tuple(summary[col] for col in columns) + (os.path.basename(file_name),)
+            )
+
+    def delete_set(self, file_name: str, file_not_exist: bool = False):
+        file_name = os.path.basename(file_name)
+        with self.lock, self.connection:
+            self.connection.execute(f"DELETE FROM {self.FILES_TABLE} WHERE {FilesColumns.FILE_NAME.value} = ?", (file_name,))
+            self.connection.execute(f"DELETE FROM {self.CARDS_TABLE} WHERE file_name = ?", (file_name,))
+        # the set is deleted even when the index cannot be changed, CardIndex.synchronize removes it later
+        CardIndex.discard_set(file_name)
+
+    def __update_card_index(self, file_name: str, data: pd.DataFrame):
+        # the set is already saved, so an error of the index does not fail the save,
+        # the set is removed from the index and indexed again by CardIndex.synchronize
+        try:
+            CardIndex.update_set(file_name, data)
+        except sqlite3.Error:
+            CardIndex.discard_set(file_name)
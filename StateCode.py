@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from constants import StatsColumns
+
+class StateCode:
+    """
+    Learning state of a row packed into one uint8 number.
+
+    The bits follow the state codes described in the info page (good_answer/good_answers_in_a_row/word_to_learn),
+    e.g. 0/0/1 is 1 and 1/1/0 is 6. State queries are lookups in the tables below indexed by the code.
+    """
+    GOOD_ANSWER = 4
+    GOOD_ANSWERS_IN_A_ROW = 2
+    WORD_TO_LEARN = 1
+
+    UNKNOWN = 1 # 0/0/1
+    UNVERIFIED = 0 # 0/0/0
+    KNOWN = 6 # 1/1/0
+
+    # lookup tables indexed by the code
+    #                        0/0/0  0/0/1  0/1/0  0/1/1  1/0/0  1/0/1  1/1/0  1/1/1
+    IS_KNOWN =      np.array([False, False, False, False, False, False, True,  False])
+    IS_UNVERIFIED = np.array([True,  False, False, False, False, False, False, False])
+    # good_answers_in_a_row without good_answer cannot be reached by answering
+    IS_INCONSISTENT = np.array([False, False, True, True, False, False, False, False])
+
+    # buckets of rows in AppData, rows with inconsistent codes are not kept in any bucket
+    BUCKET_UNKNOWN = 0 # 0/0/1
+    BUCKET_UNVERIFIED = 1 # 0/0/0
+    BUCKET_UNCONFIRMED = 2 # 1/0/0, 1/0/1, 1/1/1
+    BUCKET_KNOWN = 3 # 1/1/0
+    NO_BUCKET = -1
+    BUCKET_OF_CODE = np.array([
+        BUCKET_UNVERIFIED, BUCKET_UNKNOWN, NO_BUCKET, NO_BUCKET,
+        BUCKET_UNCONFIRMED, BUCKET_UNCONFIRMED, BUCKET_KNOWN, BUCKET_UNCONFIRMED
+    ], dtype=np.int8)
+
+    # code of the row after a good answer, a bad answer always gives 0/0/1
+    AFTER_GOOD_ANSWER = np.array([
+        4, # 0/0/0 -> 1/0/0
+        5, # 0/0/1 -> 1/0/1
+        6, # 0/1/0 -> 1/1/0
+        7, # 0/1/1 -> 1/1/1
+        6, # 1/0/0 -> 1/1/0
+        6, # 1/0/1 -> 1/1/0
+        6, # 1/1/0 -> 1/1/0
+        6  # 1/1/1 -> 1/1/0
+    ], dtype=np.uint8)
+    AFTER_BAD_ANSWER = UNKNOWN
+
+    @classmethod
+    def from_data(cls, data: pd.DataFrame) -> pd.Series:
+        """Returns codes of all rows as a uint8 Series with the index of the data."""
+        codes = (
+            data[StatsColumns.GOOD_ANSWER.value].to_numpy(dtype=bool).astype(np.uint8) * cls.GOOD_ANSWER |
+            data[StatsColumns.GOOD_ANSWERS_IN_A_ROW.value].to_numpy(dtype=bool).astype(np.uint8) * cls.GOOD_ANSWERS_IN_A_ROW |
+            data[StatsColumns.WORD_TO_LEARN.value].to_numpy(dtype=bool).astype(np.uint8) * cls.WORD_TO_LEARN
+        )
+        return pd.Series(codes.astype(np.uint8), index=data.index)
+
+    @classmethod
+    def from_row(cls, row) -> int:
+        return (
+            (cls.GOOD_ANSWER if row[StatsColumns.GOOD_ANSWER.value] else 0) |
+            (cls.GOOD_ANSWERS_IN_A_ROW if row[StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] else 0) |
+            (cls.WORD_TO_LEARN if row[StatsColumns.WORD_TO_LEARN.value] else 0)
+        )
+
+    @classmethod
+    def to_flags(cls, code: int) -> dict:
+        """Returns values of the boolean statistics columns for the code."""
+        return {
+            StatsColumns.GOOD_ANSWER.value: bool(code & cls.GOOD_ANSWER),
+            StatsColumns.GOOD_ANSWERS_IN_A_ROW.value: bool(code & cls.GOOD_ANSWERS_IN_A_ROW),
+            StatsColumns.WORD_TO_LEARN.value: bool(code & cls.WORD_TO_LEARN)
+        }
+
+    @staticmethod
+    def label(code: int) -> str:
+        return f"{code >> 2 & 1}/{code >> 1 & 1}/{code & 1}"
@@ -0,0 +1,310 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+from pandas.io.parsers.readers import STR_NA_VALUES
+from constants import FilesColumns, MAX_JOURNAL_SIZE, STORAGE_BACKEND
+from FilePathManager import FilePathManager
+from AnswerJournal import AnswerJournal
+from SetCache import SetCache
+from SetRegistry import SetRegistry
+from SetLimits import SetLimits
+from ValidationCache import ValidationCache
+from ExportEngine import ExportEngine
+from CardIndex import CardIndex
+
+class StorageBackend:
+    """
+    Interface of the storage keeping learning sets and the registry of sets.
+
+    Sets are identified by their file names (e.g. "animals_words.csv") regardless of the backend,
+    because CSV stays the import/export format and the file name carries the kind of the set.
+    """
+    # True when sets are kept as files that can be modified outside the app
+    is_file_based = False
+
+    _active = None
+
+    @classmethod
+    def get_active(cls):
+        """Returns the backend used by the application, it is created on first use."""
+        if StorageBackend._active is None:
+            if STORAGE_BACKEND == "sqlite":
+                from SqliteStorageBackend import SqliteStorageBackend
+                StorageBackend._active = SqliteStorageBackend()
+            else:
+                StorageBackend._active = CsvStorageBackend()
+        return StorageBackend._active
+
+    @classmethod
+    def set_active(cls, backend):
+        StorageBackend._active = backend
+
+    # sets
+    def load_set(self, file_name: str) -> pd.DataFrame:
+        raise NotImplementedError("This method should be overridden in subclasses")
+
+    def save_set(self, data: pd.DataFrame, file_name: str):
+        raise NotImplementedError("This method should be overridden in subclasses")
+
+    def save_set_in_chunks(self, chunks, file_name: str):
+        """
+        Writes the set from an iterable of frames with consecutive rows.
+        Backends which can write rows incrementally keep only one chunk in memory.
+        """
+        self.save_set(pd.concat(list(chunks)), file_name)
+
+    def set_fingerprint(self, file_name: str):
+        """
+        Returns (size, mtime_ns) of the file of the set, which changes when the set is modified outside the app,
+        or None when sets are not kept in files or the file does not exist.
+        """
+        return None
+
+    def save_answer(self, data: pd.DataFrame, file_name: str, index: int):
+        """Persists the statistics of one row after an answer."""
+        raise NotImplementedError("This method should be overridden in subclasses")
+
+    def flush_answers(self, data: pd.DataFrame, file_name: str):
+        """Makes sure that all answers saved by save_answer are stored with the set."""
+        raise NotImplementedError("This method should be overridden in subclasses")
+
+    def set_exists(self, file_name: str) -> bool:
+        raise NotImplementedError("This method should be overridden in subclasses")
+
+    def export_set(self, file_name: str, destination_path: str, on_progress=None):
+        """Writes the set as a CSV file to the given path, on_progress is given to ExportEngine."""
+        data = self.load_set(file_name)
+        ExportEngine(on_progress).write_file(destination_path, lambda f: data.to_csv(f, index=True))
+
+    def export_archive(self, file_names: list, destination_path: str, on_progress=None, on_member=None):
+        """
+        Writes the sets and their entries of files.csv as one zip archive, so the archive can be
+        imported again as a folder of sets. on_progress and on_member are given to ExportEngine.
+        """
+        file_names = [os.path.basename(file_name) for file_name in file_names]
+        members = [(file_name, self.archive_source(file_name)) for file_name in file_names]
+        # the registry contains only the exported sets
+        exported = set(file_names)
+        entries = [entry for entry in self.list_files() if entry[FilesColumns.FILE_NAME.value] in exported]
+        columns = [col.value for col in FilesColumns]
+        members.append(("files.csv", lambda f: pd.DataFrame(entries, columns=columns).to_csv(f, index=False)))
+        ExportEngine(on_progress).write_archive(destination_path, members, on_member)
+
+    def archive_source(self, file_name: str):
+        """Returns the path of the CSV file of the set or a function writing it, see ExportEngine.write_archive."""
+        return lambda f: self.load_set(file_name).to_csv(f, index=True)
+
+    # registry of sets
+    def create_empty_registry(self):
+        raise NotImplementedError("This method should be overridden in subclasses")
+
+    def list_files(self) -> list:
+        """Returns the list of dictionaries with FilesColumns keys, file names are without directories."""
+        raise NotImplementedError("This method should be overridden in subclasses")
+
+    def registry_version(self):
+        """
+        Returns a value which changes whenever the registry or the sets in it may have changed,
+        or None when it is not known (then callers check the registry again).
+        """
+        return None
+
+    def file_names(self) -> list:
+        return [entry[FilesColumns.FILE_NAME.value] for entry in self.list_files()]
+
+    def has_file(self, file_name: str) -> bool:
+        """Checks if a set with this file name is registered."""
+        return os.path.basename(file_name) in self.file_names()
+
+    def add_file(self, file_name: str, title: str, subtitle: str = ""):
+        raise NotImplementedError("This method should be overridden in subclasses")
+
+    def add_files(self, entries: list):
+        """Registers many sets in one batch, entries are dictionaries with FilesColumns keys."""
+        for entry in entries:
+            file_name = entry[FilesColumns.FILE_NAME.value]
+            self.add_file(file_name, entry[FilesColumns.TITLE.value], entry.get(FilesColumns.SUBTITLE.value, ""))
+            self.update_set_summary(file_name, entry)
+
+    def update_set_summary(self, file_name: str, summary: dict, persist: bool = True):
+        """
+        Updates the summary of a registered set (FilesColumns.KIND ... FilesColumns.MTIME).
+        With persist=False the backend may keep the change only in memory until the next persisted update.
+        """
+        raise NotImplementedError("This method should be overridden in subclasses")
+
+    def delete_set(self, file_name: str, file_not_exist: bool = False):
+        """Removes the set from the registry and deletes its data."""
+        raise NotImplementedError("This method should be overridden in subclasses")
+
+
+class CsvStorageBackend(StorageBackend):
+    """Keeps every set in its own CSV file and the registry in files.csv."""
+    is_file_based = True
+
+    def __init__(self):
+        self.registry = SetRegistry(FilePathManager.get_files_data_path())
+
+    def load_set(self, file_name: str) -> pd.DataFrame:
+        full_path = FilePathManager.get_csv_path(file_name)
+        data = SetCache.get(full_path)
+        if data is None:
+            data = pd.read_csv(full_path, index_col=0)
+            SetCache.put(full_path, data)
+        # apply answers which have not been folded into the file yet
+        return AnswerJournal(file_name).replay(data)
+
+    def save_set(self, data: pd.DataFrame, file_name: str):
+        full_path = FilePathManager.get_csv_path(file_name)
+        data.to_csv(full_path, index=True)
+        SetCache.put(full_path, self.__as_read(data))
+        # the file written by the app does not have to be validated before it is opened
+        if len(data) <= SetLimits.get_max_rows():
+            ValidationCache.mark_trusted(full_path, SetLimits.get_max_rows())
+        else:
+            ValidationCache.invalidate(full_path)
+        # the whole set is written, so answers from the journal are already included
+        AnswerJournal(file_name).clear()
+        self.__update_card_index(file_name, data)
+
+    @staticmethod
+    def __as_read(data: pd.DataFrame) -> pd.DataFrame:
+        # the cached frame has to be the same as pd.read_csv of the written file, e.g. empty fields of edited cards are NaN
+        text_columns = [col for col in data.columns if data[col].dtype == object]
+        if not text_columns:
+            return data
+        data = data.copy()
+        data[text_columns] = data[text_columns].where(~data[text_columns].isin(STR_NA_VALUES), np.nan)
+        return data
+
+    def save_set_in_chunks(self, chunks, file_name: str):
+        full_path = FilePathManager.get_csv_path(file_name)
+        # chunks are appended to a temporary file which replaces the set when all of them are written
+        temp_path = full_path + ".tmp"
+        rows = 0
+        try:
+            with open(temp_path, "w", newline="") as f:
+                for number, chunk in enumerate(CardIndex.index_chunks(file_name, chunks)):
+                    chunk.to_csv(f, index=True, header=number == 0)
+                    rows += len(chunk)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            # the index may have cards which were not saved, the set is indexed again by CardIndex.synchronize
+            CardIndex.discard_set(file_name)
+            raise
+        try:
+            CardIndex.set_fingerprint(file_name, self.set_fingerprint(file_name))
+        except sqlite3.Error:
+            CardIndex.discard_set(file_name)
+        # the whole set is not in memory, so it is read again when it is loaded
+        SetCache.invalidate(full_path)
+        AnswerJournal(file_name).clear()
+        if rows <= SetLimits.get_max_rows():
+            ValidationCache.mark_trusted(full_path, SetLimits.get_max_rows())
+        else:
+            ValidationCache.invalidate(full_path)
+
+    def save_answer(self, data: pd.DataFrame, file_name: str, index: int):
+        # one record is appended to the journal instead of rewriting the whole set
+        journal_size = AnswerJournal(file_name).append(index, data.loc[index])
+        if journal_size >= MAX_JOURNAL_SIZE:
+            self.save_set(data, file_name)
+
+    def flush_answers(self, data: pd.DataFrame, file_name: str):
+        self.save_set(data, file_name)
+
+    def set_fingerprint(self, file_name: str):
+        try:
+            stat = os.stat(FilePathManager.get_csv_path(file_name))
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def set_exists(self, file_name: str) -> bool:
+        file_path = FilePathManager.get_csv_path(file_name)
+        try:
+            with open(file_path, "r"):
+                pass
+        except FileNotFoundError:
+            return False
+        return True
+
+    def export_set(self, file_name: str, destination_path: str, on_progress=None):
+        ExportEngine(on_progress).copy_file(self.archive_source(file_name), destination_path)
+
+    def archive_source(self, file_name: str):
+        # answers from the journal are folded into the file first, then the file is streamed as it is
+        if AnswerJournal(file_name).has_records():
+            self.save_set(self.load_set(file_name), file_name)
+        return FilePathManager.get_csv_path(file_name)
+
+    def create_empty_registry(self):
+        self.registry.reset()
+
+    def list_files(self) -> list:
+        return self.registry.list_entries()
+
+    def registry_version(self):
+        # files of sets can be added, removed or edited outside the app, which changes the directory or the files
+        try:
+            return (
+                self.registry.version(),
+                os.stat(os.path.dirname(FilePathManager.get_files_data_path())).st_mtime_ns,
+                tuple(self.set_fingerprint(file_name) for file_name in self.file_names())
+            )
+        except Exception:
+            return None # e.g. files.csv cannot be parsed, it is reported by its validation
+
+    def file_names(self) -> list:
+        return self.registry.file_names()
+
+    def has_file(self, file_name: str) -> bool:
+        return self.registry.contains(file_name)
+
+    def add_file(self, file_name: str, title: str, subtitle: str = ""):
+        self.registry.add(file_name, title, subtitle)
+
+    def add_files(self, entries: list):
+        # files.csv is written once for all sets
+        entries_with_stat = []
+        for entry in entries:
+            try:
+                stat = os.stat(FilePathManager.get_csv_path(entry[FilesColumns.FILE_NAME.value]))
+                entry = {**entry, FilesColumns.SIZE.value: stat.st_size, FilesColumns.MTIME.value: stat.st_mtime_ns}
+            except FileNotFoundError:
+                pass
+            entries_with_stat.append(entry)
+        self.registry.add_many(entries_with_stat)
+
+    def update_set_summary(self, file_name: str, summary: dict, persist: bool = True):
+        if persist:
+            # size and modification time show if the file was changed after the summary was computed
+            try:
+                stat = os.stat(FilePathManager.get_csv_path(file_name))
+                summary = {**summary, FilesColumns.SIZE.value: stat.st_size, FilesColumns.MTIME.value: stat.st_mtime_ns}
+            except FileNotFoundError:
+                pass
+        self.registry.update_summary(file_name, summary, write=persist)
+
+    def delete_set(self, file_name: str, file_not_exist: bool = False):
+        self.registry.remove(file_name)
+
+        full_path = FilePathManager.get_csv_path(file_name)
+        if not file_not_exist and os.path.exists(full_path):
+            os.remove(full_path)
+        SetCache.invalidate(full_path)
+        ValidationCache.invalidate(full_path)
+        AnswerJournal(file_name).clear()
+        # the set is deleted even when the index cannot be changed, CardIndex.synchronize removes it later
+        CardIndex.discard_set(file_name)
+
+    def __update_card_index(self, file_name: str, data: pd.DataFrame):
+        # the set is already saved, so an error of the index does not fail the save,
+        # the set is removed from the index and indexed again by CardIndex.synchronize
+        try:
+            CardIndex.update_set(file_name, data, self.set_fingerprint(file_name))
+        except sqlite3.Error:
+            CardIndex.discard_set(file_name)
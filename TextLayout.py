@@ -0,0 +1,46 @@
+from functools import lru_cache
+from constants import TEXT_LAYOUT_CACHE_SIZE
+
+class TextLayout:
+    """
+    Wrapping of texts of cards to the width of lists.
+
+    Texts are wrapped at 20 characters per 250 pixels of the width. Lengths of texts are integers,
+    so the result depends only on the integer part of this limit, which is used as the width bucket.
+    Wrapped texts are kept in LRU caches keyed by (text, width bucket) shared by all lists,
+    so rebuilding a list or resizing the window within the same bucket does no string work.
+    """
+    @staticmethod
+    def width_bucket(width: float) -> int:
+        return int(20/250 * width) # proportion of the width
+
+    @staticmethod
+    @lru_cache(maxsize=TEXT_LAYOUT_CACHE_SIZE)
+    def wrap_alternatives(text: str, max_chars: int) -> str:
+        # alternatives separated by "/" (e.g. forms of a verb) are put in separate lines
+        if len(text) <= max_chars:
+            return text
+        return text.replace("/", "/\n")
+
+    @staticmethod
+    @lru_cache(maxsize=TEXT_LAYOUT_CACHE_SIZE)
+    def wrap_words(text: str, max_chars: int) -> str:
+        """Wraps words of the text to lines of at most max_chars characters (longer words are kept in their lines)."""
+        if len(text) <= max_chars:
+            return text
+        words = text.split(" ")
+        parts = [words[0]]
+        # length of the last line of the text written so far
+        last_line_length = len(words[0]) - words[0].rfind("\n") - 1
+        for word in words[1:]:
+            if last_line_length + 1 + len(word) > max_chars:
+                # a word with its own line breaks is left out when it does not fit
+                if "\n" not in word:
+                    parts.append("\n")
+                    parts.append(word)
+                last_line_length = len(word) - word.rfind("\n") - 1
+            else:
+                parts.append(" ")
+                parts.append(word)
+                last_line_length = len(word) - word.rfind("\n") - 1 if "\n" in word else last_line_length + 1 + len(word)
+        return "".join(parts)
@@ -1,15 +1,29 @@
 import flet as ft
 from ContentTile import ContentTile
+from SearchIndex import SearchIndex
+from CardSearchResults import CardSearchResults
+from FilePathManager import FilePathManager
 from AppData import get_file_names_and_titles, delate_set
-from constants import FilesColumns
+from constants import FilesColumns, SEARCH_SCROLL_DURATION
 from Greetings import Greetings
 from page_functions import create_alert_dialog
 from PageProperties import PageProperties
-from FilePathManager import FilePathManager
+from StorageBackend import StorageBackend
 import threading
-import time
+import os
 
 class TilesContainer(ft.Container):
+    # columns of files.csv shown by tiles, a tile is built again only when one of them changes
+    SHOWN_COLUMNS = [
+        FilesColumns.FILE_NAME.value,
+        FilesColumns.TITLE.value,
+        FilesColumns.SUBTITLE.value,
+        FilesColumns.ROWS.value,
+        FilesColumns.KNOWN.value,
+        FilesColumns.LEARNING.value,
+        FilesColumns.TO_LEARN.value
+    ]
+    
     def __init__(self, page=None, export_mode=False):
         super().__init__()   
         
@@ -18,27 +32,36 @@ class TilesContainer(ft.Container):
         self.tiles_with_patterns = []
         self.last_pattern = ""
         self.index_of_focused_tile = 0
-        self.index_of_all_tiles = 0
         self.lock = threading.Lock()
+        # it is increased by every new search, a running search stops when it is not the latest one
+        self.search_generation = 0
+        self.search_index = SearchIndex()
+        self.indicated_tiles = set() # tiles with highlighted patterns
+        self.changed_tiles = set() # tiles changed in memory which have not been sent to the page yet
+        
+        # file names of sets selected for the export to one zip archive
+        self.selected_for_export = set()
+        
+        # tiles are kept between refreshes, the registry is checked again only when its version changes
+        self.registry_version = None
         
         files_and_titles = self.__validate_and_get_files(PageProperties.get_page()) 
         
         lv = ft.ListView(
             expand=True,
             spacing=10,
-            controls=[
-                ContentTile(
-                    entry[FilesColumns.FILE_NAME.value],
-                    entry[FilesColumns.TITLE.value],
-                    entry[FilesColumns.SUBTITLE.value],
-                    parent_container=self,
-                    key=entry[FilesColumns.FILE_NAME.value],
-                    export_mode=export_mode)
-                for entry in files_and_titles
-            ]
+            # all tiles are built, so the search can scroll to any of them by its key
+            build_controls_on_demand=False,
+            controls=[self.__create_tile(entry) for entry in files_and_titles]
         )
+        # file name -> values shown by its tile
+        self.tile_values = {entry[FilesColumns.FILE_NAME.value]: self.__shown_values(entry) for entry in files_and_titles}
         
+        self.tiles_list = lv
+        # the list of tiles is replaced by results while searching in cards
+        self.card_results = None
         self.content = lv
+        self.__index_tiles()
         self.padding = 10
         self.width = PageProperties.width * 0.87
         self.height = PageProperties.height * 0.65
@@ -58,20 +81,54 @@ class TilesContainer(ft.Container):
         e.page.update()
         
     def refresh_content(self):
+        storage = StorageBackend.get_active()
+        if self.registry_version is not None and storage.registry_version() == self.registry_version:
+            return # no set has been added, removed or changed since the last refresh
+        
         files_and_titles = self.__validate_and_get_files(PageProperties.get_page())
-        self.content.controls.clear()
+        
+        # existing tiles of unchanged entries are kept, so only changed tiles are sent to the page
+        tiles = {tile.key: tile for tile in self.tiles_list.controls}
+        controls = []
         for entry in files_and_titles:
-            self.content.controls.append(
-                ContentTile(
-                    entry[FilesColumns.FILE_NAME.value], 
-                    entry[FilesColumns.TITLE.value],
-                    entry[FilesColumns.SUBTITLE.value],
-                    parent_container=self,
-                    key=entry[FilesColumns.FILE_NAME.value],
-                    export_mode=self.export_mode
-                )
-            )
+            file_name = entry[FilesColumns.FILE_NAME.value]
+            tile = tiles.get(file_name)
+            if tile is None or self.tile_values.get(file_name) != self.__shown_values(entry):
+                tile = self.__create_tile(entry)
+            controls.append(tile)
+        self.tiles_list.controls = controls
+        self.__index_tiles()
+        self.tile_values = {entry[FilesColumns.FILE_NAME.value]: self.__shown_values(entry) for entry in files_and_titles}
         self.update()
+    
+    @classmethod
+    def __shown_values(cls, entry: dict) -> tuple:
+        return tuple(entry.get(col) for col in cls.SHOWN_COLUMNS)
+    
+    def __create_tile(self, entry: dict):
+        return ContentTile(
+            entry[FilesColumns.FILE_NAME.value],
+            entry[FilesColumns.TITLE.value],
+            entry[FilesColumns.SUBTITLE.value],
+            parent_container=self,
+            key=entry[FilesColumns.FILE_NAME.value],
+            export_mode=self.export_mode,
+            summary=entry,
+            selected=entry[FilesColumns.FILE_NAME.value] in self.selected_for_export
+        )
+        
+    def select_for_export(self, file_name: str, selected: bool):
+        if selected:
+            self.selected_for_export.add(file_name)
+        else:
+            self.selected_for_export.discard(file_name)
+    
+    def file_names_for_export(self, only_selected: bool = False) -> list:
+        """Returns file names of shown sets in their order, only selected ones if only_selected is True."""
+        file_names = [tile.file_name for tile in self.tiles_list.controls if isinstance(tile, ContentTile)]
+        if only_selected:
+            file_names = [file_name for file_name in file_names if file_name in self.selected_for_export]
+        return file_names
         
     def did_mount(self):
         # update tiles when control is mounted
@@ -86,16 +143,11 @@ class TilesContainer(ft.Container):
         """
         Check if the container has any ContentTile controls
         """
-        return len(self.content.controls) > 0
+        return len(self.tiles_list.controls) > 0
         
     @staticmethod    
     def __file_exist(file_name):
-        file_path = FilePathManager.get_csv_path(file_name)
-        try:
-            with open(file_path):
-                return True
-        except FileNotFoundError:
-            return False
+        return StorageBackend.get_active().set_exists(file_name)
         
     def __validate_and_get_files(self, page=None):
         """
@@ -135,6 +187,7 @@ class TilesContainer(ft.Container):
                     action_function=lambda e: self.__repair_files_and_reload(e)
                 )
                 # Return empty list - content will be updated after repair
+                self.registry_version = None
                 return []
         
         # Get list of files
@@ -163,6 +216,16 @@ class TilesContainer(ft.Container):
         if file_has_been_removed:
             files_and_titles = get_file_names_and_titles()
         
+        # recently studied sets are shown first, the rest keeps the order of files.csv
+        if not self.export_mode:
+            files_and_titles = sorted(
+                files_and_titles,
+                key=lambda entry: entry.get(FilesColumns.LAST_STUDIED.value) or "",
+                reverse=True
+            )
+        
+        # the registry has been checked in this version, nothing has to be checked until it changes
+        self.registry_version = StorageBackend.get_active().registry_version()
         return files_and_titles
 
     def __repair_files_and_reload(self, e):
@@ -206,130 +269,150 @@ class TilesContainer(ft.Container):
         self.refresh_content()  
     
     # Methods involved in searching mode
+    def __index_tiles(self):
+        with self.lock:
+            self.tiles_by_key = {tile.key: tile for tile in self.tiles_list.controls}
+            # tiles which are not in the list anymore are not updated
+            self.indicated_tiles.intersection_update(self.tiles_by_key.values())
+            self.changed_tiles.intersection_update(self.tiles_by_key.values())
+            # only tiles with changed titles or subtitles are indexed again
+            self.search_index.update([(tile.key, tile.title, tile.subtitle) for tile in self.tiles_list.controls])
+    
+    def __scroll_to_tile(self, key):
+        # it is called without the lock, scrolling is one message to the page,
+        # the position of the tile is taken from the page, so wrapped titles and subtitles are included
+        if key is not None:
+            self.tiles_list.scroll_to(key=key, duration=SEARCH_SCROLL_DURATION)
+    
     def trigger_searching_mode(self):
-        # add all tiles to tiles with patterns
-        self.tiles_with_patterns = self.content.controls.copy()
-        self.index_of_all_tiles = len(self.content.controls) - 1 # it is used in __scroll_to_tile method
-        self.__scroll_to_tile(0, "up")
+        with self.lock:
+            # add all tiles to tiles with patterns
+            self.tiles_with_patterns = self.tiles_list.controls.copy()
+            target = self.tiles_with_patterns[0].key if self.tiles_with_patterns else None
+        self.__scroll_to_tile(target)
+    
+    def new_search_generation(self) -> int:
+        # it does not wait for the lock, so a running search is cancelled at once
+        self.search_generation += 1
+        return self.search_generation
+    
+    def __is_stale(self, generation) -> bool:
+        return generation is not None and generation != self.search_generation
     
     def turn_off_searching_mode(self):
+        self.new_search_generation()
         # clear all tiles from tiles with patterns and without patterns
         self.tiles_with_patterns.clear()
+        self.indicated_tiles.clear()
         
         self.last_pattern = ""
         self.index_of_focused_tile = 0
-        self.index_of_all_tiles = 0
         
     def reset_indications(self):
         with self.lock:
-            # all tiles
-            for tile in self.content.controls:
-                tile.reset_indication()
+            # only highlighted tiles are changed, all of them are sent to the page at once
+            self.changed_tiles.update(tile for tile in self.indicated_tiles if tile.reset_indication(update=False))
+            self.indicated_tiles.clear()
+        self.__send_changes()
+    
+    def __send_changes(self):
+        # one update of the container sends all tiles changed in memory, also by searches which became stale,
+        # a container which is not on the page is not updated
+        with self.lock:
+            if not self.changed_tiles or self.page is None:
+                return
+            self.changed_tiles.clear()
+        self.update()
         
-    def indicate_patterns_and_scroll_to_first(self, pattern: str):
+    def indicate_patterns_and_scroll_to_first(self, pattern: str, generation: int = None):
+        """Indicates the pattern in tiles and scrolls to the first one, it stops when a newer search has started."""
+        target = None
         with self.lock:
-            # check if not last pattern is in the beginning of the new pattern
-            if not pattern.lower().startswith(self.last_pattern.lower()):
-                # reset tiles with patterns
-                for tile in self.tiles_with_patterns:
-                    tile.reset_indication()
-                
-                # clear tiles without patterns and add all tiles to tiles with patterns
-                self.tiles_with_patterns.clear()
-                self.tiles_with_patterns = self.content.controls.copy()
-                self.index_of_focused_tile = 0
-                
-
-            new_tiles_with_patterns = []
-
-            for tile in self.tiles_with_patterns:
-                if tile.contains_pattern(pattern):
-                    if pattern != "":
-                        tile.indicate_pattern(pattern)
-
-                    new_tiles_with_patterns.append(tile)
-                else:
-                    tile.reset_indication()
-
-            self.tiles_with_patterns = new_tiles_with_patterns
+            if self.__is_stale(generation):
+                return
+            # tiles are found in the index in the order of the list, titles and subtitles are not scanned
+            self.tiles_with_patterns = [self.tiles_by_key[key] for key in self.search_index.search(pattern)]
+            self.index_of_focused_tile = 0
+            self.last_pattern = pattern
+            found = set(self.tiles_with_patterns) if pattern != "" else set()
+            
+            # tiles are changed in memory, tiles highlighted in the same way are not touched
+            for tile in list(self.indicated_tiles - found):
+                if self.__is_stale(generation):
+                    return # changed tiles are kept in changed_tiles, so they are sent by the next search
+                if tile.reset_indication(update=False):
+                    self.changed_tiles.add(tile)
+                self.indicated_tiles.discard(tile)
+            
+            for i, tile in enumerate(self.tiles_with_patterns if pattern != "" else []):
+                if self.__is_stale(generation):
+                    return
+                # from all indicated tiles, set main color in the first one
+                self.__indicate(tile, main_color=(i == 0))
             
             # scroll to the first tile with pattern
             if len(self.tiles_with_patterns) > 0:
-                if self.index_of_all_tiles - self.__index_of_first_tile_with_pattern(pattern) > 0:
-                    self.__scroll_to_tile(0, "up")
-                else:
-                    self.__scroll_to_tile(0, "down")
-                
-                if pattern != "": # from all indicated tiles, set main color in the first one
-                    self.tiles_with_patterns[0].indicate_pattern(pattern, main_color=True)
-                self.index_of_focused_tile = 0
-            
-            self.last_pattern = pattern
-        
-    def __index_of_first_tile_with_pattern(self, pattern):
-        if pattern == "":
-            return 0
-        
-        for tile in self.content.controls:
-            if tile.contains_pattern(pattern):
-                return self.content.controls.index(tile)
+                target = self.tiles_with_patterns[0].key
+        if not self.__is_stale(generation):
+            self.__send_changes()
+            self.__scroll_to_tile(target)
+    
+    def __indicate(self, tile, main_color=False) -> bool:
+        # a tile whose highlighting has changed is sent by __send_changes
+        self.indicated_tiles.add(tile)
+        if tile.indicate_pattern(self.search_index.spans(tile.key, self.last_pattern), main_color=main_color, update=False):
+            self.changed_tiles.add(tile)
+    
+    # search in cards of all sets
+    def show_card_results(self, results: list, generation: int = None):
+        """Shows cards found by CardIndex.search instead of tiles, unless a newer search has started."""
+        if self.__is_stale(generation):
+            return
+        titles = {os.path.basename(tile.file_name): tile.title for tile in self.tiles_list.controls}
+        self.card_results = CardSearchResults(results, titles, on_open=self.__open_card)
+        self.content = self.card_results
+        self.update()
+    
+    def show_tiles(self, update: bool = True):
+        if self.content is self.tiles_list:
+            return
+        self.card_results = None
+        self.content = self.tiles_list
+        if update:
+            self.update()
+    
+    def __open_card(self, e, file_name: str, row_index: int):
+        tile = self.tiles_by_key.get(FilePathManager.get_csv_path(file_name))
+        if tile is None:
+            return # the set has been removed since the search
+        tile.open_set(e, start_index=row_index)
     
     def __reset_main_color_indication_in_previous_tile(self, index):
         assert index >= 0 and index < len(self.tiles_with_patterns)
-        self.tiles_with_patterns[index].indicate_pattern(self.last_pattern, main_color=False)  
+        self.__indicate(self.tiles_with_patterns[index], main_color=False)
             
     def __set_main_color_indication_in_next_tile(self, index):
         assert index < len(self.tiles_with_patterns) and index >= 0
-        self.tiles_with_patterns[index].indicate_pattern(self.last_pattern, main_color=True) 
-        
-    def __scroll_to_tile(self, index, up_or_down): # add argument up_or_down
-        assert index < len(self.tiles_with_patterns) and index >= 0
-        assert up_or_down == "up" or up_or_down == "down"
-        
-        DURATION = 0.01
-        
-        if up_or_down == "down":
-            self.index_of_all_tiles = 0
-            for tile in self.content.controls:
-                if tile.key == self.tiles_with_patterns[index].key:
-                    break
-                
-                time.sleep(DURATION)
-                self.content.scroll_to(key = tile.key)
-                self.index_of_all_tiles += 1
-                
-        elif up_or_down == "up":
-            break_flag = False                
-            self.index_of_all_tiles = len(self.content.controls) - 1
-            for tile in reversed(self.content.controls):
-                if self.index_of_all_tiles < 0:
-                    raise IndexError             
-                
-                time.sleep(DURATION)
-                self.content.scroll_to(key = tile.key)
-                if break_flag:
-                    break
-                
-                self.index_of_all_tiles -= 1
-                
-                if tile.key == self.tiles_with_patterns[index].key:
-                    self.index_of_all_tiles += 1
-                    break_flag = True             
-        
+        self.__indicate(self.tiles_with_patterns[index], main_color=True)
     
     def scroll_to_next(self):
+        target = None
         with self.lock:
             if (self.index_of_focused_tile < len(self.tiles_with_patterns) - 1) and (self.last_pattern != ""):
                 self.index_of_focused_tile += 1
                 self.__reset_main_color_indication_in_previous_tile(self.index_of_focused_tile - 1)
                 self.__set_main_color_indication_in_next_tile(self.index_of_focused_tile)
-                self.__scroll_to_tile(self.index_of_focused_tile, "down")
+                target = self.tiles_with_patterns[self.index_of_focused_tile].key
+        self.__send_changes()
+        self.__scroll_to_tile(target)
     
     def scroll_to_previous(self):
+        target = None
         with self.lock:
             if (self.index_of_focused_tile > 0) and (self.last_pattern != ""):
                 self.index_of_focused_tile -= 1
-                self.__reset_main_color_indication_in_previous_tile(self.index_of_focused_tile+1)
+                self.__reset_main_color_indication_in_previous_tile(self.index_of_focused_tile + 1)
                 self.__set_main_color_indication_in_next_tile(self.index_of_focused_tile)
-                self.__scroll_to_tile(self.index_of_focused_tile, "up")
-
+                target = self.tiles_with_patterns[self.index_of_focused_tile].key
+        self.__send_changes()
+        self.__scroll_to_tile(target)
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from FilePathManager import FilePathManager
+from CSVValidator import CSVValidator
+from constants import VALIDATION_CACHE_CONTENT_HASH
+
+class ValidationCache:
+    """
+    Persistent cache of validation results of set files.
+
+    Entries are keyed by the file name and are valid as long as the size and the modification time
+    of the file (and the row limit used by the validation) do not change. Files written by the app
+    are marked as trusted, so only files changed outside the app are validated again.
+    With content hashes enabled, a file whose modification time changed but whose content did not
+    (e.g. restored from a backup) is not validated again either.
+    Inside deferred_writes() the file is written once at the end instead of after every change.
+    """
+    use_content_hash = VALIDATION_CACHE_CONTENT_HASH
+    _entries = None # file name -> {"size", "mtime_ns", "max_rows", "hash", "result"}
+    _lock = threading.Lock()
+    _deferring = 0 # depth of nested deferred_writes()
+    _has_unwritten_changes = False
+
+    @staticmethod
+    def __content_hash(path: str) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def __load(cls):
+        if cls._entries is not None:
+            return
+        try:
+            with open(FilePathManager.get_validation_cache_path(), "r", encoding="utf-8") as f:
+                cls._entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            cls._entries = {}
+
+    @classmethod
+    @contextmanager
+    def deferred_writes(cls):
+        """Changes made inside the block (e.g. by saving of many imported sets) are written to the file once."""
+        with cls._lock:
+            cls._deferring += 1
+        try:
+            yield
+        finally:
+            with cls._lock:
+                cls._deferring -= 1
+                if cls._deferring == 0 and cls._has_unwritten_changes:
+                    cls.__write()
+
+    @classmethod
+    def __write(cls):
+        # it is called with the lock
+        if cls._deferring > 0:
+            cls._has_unwritten_changes = True
+            return
+        cls._has_unwritten_changes = False
+        # the file is replaced at once, so an interrupted write does not leave a broken cache
+        path = FilePathManager.get_validation_cache_path()
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(cls._entries, f)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def get(cls, path: str, max_rows: int, stat: os.stat_result = None):
+        """Returns the cached validation result or None if the file has changed since it was validated."""
+        if stat is None:
+            stat = os.stat(path)
+        key = os.path.basename(path)
+        with cls._lock:
+            cls.__load()
+            entry = cls._entries.get(key)
+            if entry is None or entry["max_rows"] != max_rows:
+                return None
+            if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                return entry["result"]
+            if not cls.use_content_hash or entry["hash"] is None or entry["size"] != stat.st_size:
+                return None
+        # only the modification time has changed, the content decides
+        if cls.__content_hash(path) != entry["hash"]:
+            return None
+        cls.put(path, max_rows, entry["result"], stat)
+        return entry["result"]
+
+    @classmethod
+    def put(cls, path: str, max_rows: int, result: dict, stat: os.stat_result = None):
+        """Stores the validation result of the current content of the file."""
+        try:
+            if stat is None:
+                stat = os.stat(path)
+            content_hash = cls.__content_hash(path) if cls.use_content_hash else None
+        except FileNotFoundError:
+            return
+        with cls._lock:
+            cls.__load()
+            cls._entries[os.path.basename(path)] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "max_rows": max_rows,
+                "hash": content_hash,
+                "result": result
+            }
+            cls.__write()
+
+    @classmethod
+    def mark_trusted(cls, path: str, max_rows: int):
+        """Marks the file as valid, it is used after the app has written the file."""
+        result = {
+            "errors": [],
+            "warnings": [],
+            "is_valid": True,
+            "requires_specific_actions": False,
+            "has_statistics": True,
+            "name_suggestion": CSVValidator.name_suggestion(path),
+            "data_type": "words" if path.endswith("_words.csv") else "definitions"
+        }
+        cls.put(path, max_rows, result)
+
+    @classmethod
+    def invalidate(cls, path: str):
+        with cls._lock:
+            cls.__load()
+            if cls._entries.pop(os.path.basename(path), None) is not None:
+                cls.__write()
@@ -0,0 +1,91 @@
+import flet as ft
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from constants import VIRTUAL_LIST_OVERSCAN
+
+class VirtualListView(ft.ListView):
+    """
+    ListView which has controls only for items in the visible range and VIRTUAL_LIST_OVERSCAN items around it.
+
+    Heights of items are given in advance, items above and below the window are replaced by two spacers,
+    so the scroll extent is the same as for the whole list. The window is found by a binary search
+    in prefix sums of heights. Controls of items leaving the window are recycled for items entering it:
+    create_control(i) is called only when there are no free controls, update_control(control, i) otherwise.
+    Controls are given the height of their item and a bottom margin of the spacing between items.
+    """
+    def __init__(self, create_control, update_control, viewport_height: float, spacing: int = 10, **kwargs):
+        super().__init__(spacing=0, on_scroll=self.__on_scroll, on_scroll_interval=50, **kwargs)
+        self.create_control = create_control
+        self.update_control = update_control
+        self.viewport_height = viewport_height
+        self.item_spacing = spacing
+        self.scroll_offset = 0
+
+        self.top_spacer = ft.Container(height=0)
+        self.bottom_spacer = ft.Container(height=0)
+        self.controls = [self.top_spacer, self.bottom_spacer]
+
+        self.__heights = []
+        self.__offsets = [0] # offsets[i] is the position of the item i, the last one is the height of the list
+        self.__window = {} # item -> control
+        self.__free_controls = []
+
+    @property
+    def item_count(self) -> int:
+        return len(self.__heights)
+
+    def set_items(self, heights: list):
+        """Replaces all items, controls are rebuilt for the window at the top of the list."""
+        self.__heights = list(heights)
+        self.__offsets = [0] + list(accumulate(height + self.item_spacing for height in self.__heights))
+        # controls of the previous items show other items now
+        self.__free_controls.extend(self.__window.values())
+        self.__window = {}
+        self.scroll_offset = 0
+        self.__render_window()
+        # changes of content do not scroll the list on the client, so it is moved to the rendered window
+        if self.page is not None:
+            self.scroll_to(offset=0)
+
+    def set_viewport_height(self, height: float):
+        self.viewport_height = height
+        self.__render_window()
+
+    def __on_scroll(self, e: ft.OnScrollEvent):
+        self.scroll_offset = e.pixels or 0
+        if e.viewport_dimension:
+            self.viewport_height = e.viewport_dimension
+        first, last = self.__visible_range()
+        # the window is changed only when items outside of it become visible
+        if first not in self.__window or last - 1 not in self.__window:
+            self.__render_window()
+            self.update()
+
+    def __visible_range(self) -> tuple:
+        first = max(bisect_right(self.__offsets, self.scroll_offset) - 1, 0)
+        last = min(bisect_left(self.__offsets, self.scroll_offset + self.viewport_height), self.item_count)
+        return min(first, last), last
+
+    def __render_window(self):
+        first, last = self.__visible_range()
+        first = max(first - VIRTUAL_LIST_OVERSCAN, 0)
+        last = min(last + VIRTUAL_LIST_OVERSCAN, self.item_count)
+
+        window = {item: control for item, control in self.__window.items() if first <= item < last}
+        self.__free_controls.extend(control for item, control in self.__window.items() if item not in window)
+        for item in range(first, last):
+            if item in window:
+                continue
+            if self.__free_controls:
+                control = self.__free_controls.pop()
+                self.update_control(control, item)
+            else:
+                control = self.create_control(item)
+            control.height = self.__heights[item]
+            control.margin = ft.margin.only(bottom=self.item_spacing)
+            window[item] = control
+        self.__window = window
+
+        self.top_spacer.height = self.__offsets[first]
+        self.bottom_spacer.height = self.__offsets[-1] - self.__offsets[last]
+        self.controls = [self.top_spacer] + [window[item] for item in range(first, last)] + [self.bottom_spacer]
@@ -7,8 +7,8 @@ from BaseWordField import BaseWordField
 from PageProperties import PageProperties
 
 class WordFields(BaseWordField):
-    def __init__(self, file_name: str = "data_words.csv", page=None, width=300):
-        super().__init__(file_name, page)
+    def __init__(self, file_name: str = "data_words.csv", page=None, width=300, start_index=None):
+        super().__init__(file_name, page, start_index)
         factor = 0.90
         if PageProperties.platform == ft.PagePlatform.WINDOWS:
             factor = 0.83
@@ -1,9 +1,14 @@
 import flet as ft
+import numpy as np
+import pandas as pd
 from AppData import AppData, get_kind_of_file_and_validate
 from typing import Dict
 from Controls import ProgressBar
 from constants import PartsOfSpeech, WordDefinitions, StatsColumns
 from PageProperties import PageProperties
+from StateCode import StateCode
+from VirtualListView import VirtualListView
+from TextLayout import TextLayout
 
 BORDERS = {
             "To learn": ft.border.all(1.5, ft.Colors.BLUE_GREY_700),
@@ -20,48 +25,59 @@ COLORS_CHECKS = {
         }
 
 class WordContainer(ft.Container):
+    # sizes used to compute the height of the container before it is built (see VirtualListView)
+    LINE_HEIGHT = 20
+    FIELDS_SPACING = 10
+    PADDING = 10
+    MAX_BORDER_WIDTH = 3
+    
+    STATS_COLUMNS = [
+        StatsColumns.CORRECT_ANSWERS.value, 
+        StatsColumns.GOOD_ANSWER.value, 
+        StatsColumns.GOOD_ANSWERS_IN_A_ROW.value,
+        StatsColumns.WORD_TO_LEARN.value
+    ]
+    
+    COLUMNS_DEFINITIONS = [
+        WordDefinitions.DEFINITION.value,
+        WordDefinitions.WORD.value
+    ]
+    
+    # dictionary with index names where the length of the index name is equal to the max length
+    INDEX_NAMES = { # it is used to make the columns the same width
+        PartsOfSpeech.VERB.value: "Verb        ",
+        PartsOfSpeech.PERSON.value: "Person    ",
+        PartsOfSpeech.THING.value: "Thing      ",
+        PartsOfSpeech.ADJECTIVE.value: "Adjective",
+        PartsOfSpeech.ADVERB.value: "Adverb   ",
+        WordDefinitions.DEFINITION.value: "Definition",
+        WordDefinitions.WORD.value: "Word       ",
+    }
+    
     def __init__(self, words_row, width, was_in_previous_session=False):
         super().__init__()
-        # checking if the row have correct columns
-        stats_columns = [
-            StatsColumns.CORRECT_ANSWERS.value, 
-            StatsColumns.GOOD_ANSWER.value, 
-            StatsColumns.GOOD_ANSWERS_IN_A_ROW.value,
-            StatsColumns.WORD_TO_LEARN.value
-        ]
+        self.padding = self.PADDING
         
-        columns_words = [
-            PartsOfSpeech.VERB.value,
-            PartsOfSpeech.PERSON.value,
-            PartsOfSpeech.THING.value,
-            PartsOfSpeech.ADJECTIVE.value,
-            PartsOfSpeech.ADVERB.value
-        ]
+        # indicating state (to learn, learned, known)
+        self.border_radius = 5
+        self.clip_behavior = ft.ClipBehavior.HARD_EDGE
         
-        columns_definitions = [
-            WordDefinitions.DEFINITION.value,
-            WordDefinitions.WORD.value
-        ]
+        self.content = ft.Column(spacing=self.FIELDS_SPACING)
+        self.set_row(words_row, width, was_in_previous_session)
         
-        columns_words.extend(stats_columns)
-        columns_definitions.extend(stats_columns)
+    def set_row(self, words_row, width, was_in_previous_session=False):
+        """Shows another row (a Series or a dictionary) in this container, Text controls of fields are reused."""
+        # checking if the row have correct columns
+        columns_words = [col.value for col in PartsOfSpeech] + self.STATS_COLUMNS
+        columns_definitions = self.COLUMNS_DEFINITIONS + self.STATS_COLUMNS
         
-        assert  all([col in words_row.index for col in columns_words]) or \
-                all([col in words_row.index for col in columns_definitions]) \
+        assert  all([col in words_row for col in columns_words]) or \
+                all([col in words_row for col in columns_definitions]) \
                 , "The row must have correct columns."
         
-        self.padding = 10
-        
-        # indicating state (to learn, learned, known)
-        self.border_radius = 5
-        
-        self.to_learn = words_row[StatsColumns.GOOD_ANSWER.value] == False \
-                    and words_row[StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] == False \
-                    and words_row[StatsColumns.WORD_TO_LEARN.value] == False
-                    
-        self.known =    words_row[StatsColumns.GOOD_ANSWER.value] == True \
-                    and words_row[StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] == True \
-                    and words_row[StatsColumns.WORD_TO_LEARN.value] == False
+        state_code = StateCode.from_row(words_row)
+        self.to_learn = bool(StateCode.IS_UNVERIFIED[state_code])
+        self.known = bool(StateCode.IS_KNOWN[state_code])
                     
         self.in_previous_session = was_in_previous_session
                     
@@ -75,64 +91,42 @@ class WordContainer(ft.Container):
             # indicating by orange border learned words
             self.border = BORDERS["Learned"]
         
-        # dropping NaN values
-        words_row = words_row.dropna()
-        
-        # finding words that are to long
-        
-        char_threshold = 20/250 * width # proportion of the width
-        
-        for word in words_row.index:
-            # it means that the word is not kind of stats and definitions
-            if not ((word in stats_columns) or (word in columns_definitions)): 
-                if len(words_row[word]) > char_threshold: 
-                    list_words = words_row[word].split("/")
-                    words_row[word] = list_words[0]
-                    for word_l in list_words[1:]:
-                        words_row[word] += "/\n" + word_l
-            elif not (word in stats_columns): # it could be definition or something else but not stats
-                if len(words_row[word]) > char_threshold:
-                    list_words = words_row[word].split(" ")
-                    new_word = list_words[0]
-                    current_line = list_words[0]
-                    for word_l in list_words[1:]:
-                        real_last_line = current_line.split("\n")[-1]
-                        if len(real_last_line + " " + word_l) > char_threshold:
-                            if not "\n" in word_l:
-                                new_word += "\n" + word_l
-                            current_line = word_l
-                        else:
-                            new_word += " " + word_l
-                            current_line += " " + word_l
-                    words_row[word] = new_word
-                    
-            
-        # creating dictionary with index names where the length of the index name is equal to the max length
-        dict_index_names = { # it is used to make the columns the same width
-            PartsOfSpeech.VERB.value: "Verb        ",
-            PartsOfSpeech.PERSON.value: "Person    ",
-            PartsOfSpeech.THING.value: "Thing      ",
-            PartsOfSpeech.ADJECTIVE.value: "Adjective",
-            PartsOfSpeech.ADVERB.value: "Adverb   ",
-            WordDefinitions.DEFINITION.value: "Definition",
-            WordDefinitions.WORD.value: "Word       ",
-        }
+        fields = self.layout(words_row, width)
+        rows = self.content.controls
+        # rows of the previous row are reused, only missing ones are created
+        while len(rows) < len(fields):
+            rows.append(ft.Row([ft.Text(color=ft.Colors.BLUE_GREY_500), ft.Text()]))
+        del rows[len(fields):]
+        for row, (column, text) in zip(rows, fields):
+            row.controls[0].value = self.INDEX_NAMES[column]
+            row.controls[1].value = text
+        
+    @classmethod
+    def layout(cls, words_row, width) -> list:
+        """Returns (column, text) pairs of fields shown in the container, texts are wrapped to the width."""
+        # NaN values and statistics are not shown
+        fields = [
+            (word, value) for word, value in words_row.items()
+            if not (word in cls.STATS_COLUMNS) and not pd.isna(value)
+        ]
         
+        # finding words that are to long, wrapped texts are cached (see TextLayout)
+        max_chars = TextLayout.width_bucket(width)
         
-        Column_with_words = ft.Column()
+        for i, (word, value) in enumerate(fields):
+            # it means that the word is not kind of definitions
+            if not (word in cls.COLUMNS_DEFINITIONS): 
+                fields[i] = (word, TextLayout.wrap_alternatives(value, max_chars))
+            else: # it could be definition or something else but not stats
+                fields[i] = (word, TextLayout.wrap_words(value, max_chars))
         
-        for word in words_row.index:
-            if not (word in stats_columns):
-                Column_with_words.controls.append(
-                    ft.Row(
-                        [
-                            ft.Text(dict_index_names[word], color=ft.Colors.BLUE_GREY_500),
-                            ft.Text(words_row[word]),
-                        ],
-                    )
-                )
-            
-        self.content = Column_with_words
+        return fields
+    
+    @classmethod
+    def height_of_layout(cls, fields: list) -> int:
+        lines = sum(text.count("\n") + 1 for _, text in fields)
+        spacing = cls.FIELDS_SPACING * max(len(fields) - 1, 0)
+        return lines * cls.LINE_HEIGHT + spacing + 2 * (cls.PADDING + cls.MAX_BORDER_WIDTH)
         
     def is_to_learn(self):
         return self.to_learn
@@ -234,9 +228,14 @@ class WordListMenu(ft.Column):
             on_click=on_button_click
         )
         
-        self.lv =   ft.ListView(
-            expand=True, 
-            spacing=10, 
+        # rows shown in the list as (row, was_in_previous_session), controls are built only for visible ones
+        self.shown_rows = []
+        self.lv = VirtualListView(
+            create_control=lambda i: WordContainer(self.shown_rows[i][0], width=self.width, was_in_previous_session=self.shown_rows[i][1]),
+            update_control=lambda wc, i: wc.set_row(self.shown_rows[i][0], width=self.width, was_in_previous_session=self.shown_rows[i][1]),
+            viewport_height=PageProperties.height * 0.7 - 20, # minus padding of the container
+            expand=True,
+            spacing=10,
         )
         
         self.container = ft.Container(
@@ -257,34 +256,36 @@ class WordListMenu(ft.Column):
         ]
         
     def __update_lv(self):
-        self.lv.controls.clear()
+        # the set is loaded once, rows of selected chips are found with masks before any control is built
+        self.words.refresh()
+        masks = self.__category_masks()
+        self.shown_rows = []
         for label, chip in self.dict_filter_chips.items():
             if chip.selected:
-                self.__add_words_to_list_view(label)
+                self.__add_words_to_list_view(masks[label], masks["Previous session"])
+        # heights are computed from texts, no control is built for rows outside of the visible range
+        self.lv.set_items([
+            WordContainer.height_of_layout(WordContainer.layout(row, self.width)) for row, _ in self.shown_rows
+        ])
         self.update()
 
-    def __add_words_to_list_view(self, label):
-        self.words.refresh()
-        for row in self.words.words.iterrows():
-            is_in_previous_session = self.words.was_this_index_drawn(row[0])
-            wc = WordContainer(row[1], 
-                               width=self.width, 
-                               was_in_previous_session=is_in_previous_session)
-            if self.__should_add_word(label, wc):
-                self.lv.controls.append(wc)
+    def __category_masks(self) -> dict:
+        # one mask per chip label computed from state codes of all rows
+        codes = self.words.state_codes.to_numpy()
+        to_learn = StateCode.IS_UNVERIFIED[codes]
+        known = StateCode.IS_KNOWN[codes]
+        return {
+            "All": np.ones(len(codes), dtype=bool),
+            "Previous session": self.words.words.index.isin(AppData.last_group_of_indexes),
+            "Learned": ~to_learn & ~known,
+            "To learn": to_learn,
+            "Known": known,
+        }
 
-    def __should_add_word(self, label, wc):
-        if label == "Learned" and wc.is_learned():
-            return True
-        elif label == "To learn" and wc.is_to_learn():
-            return True
-        elif label == "Known" and wc.is_known():
-            return True
-        elif label == "All":
-            return True
-        elif label == "Previous session" and wc.was_in_previous_session():
-            return True
-        return False
+    def __add_words_to_list_view(self, mask, previous_session_mask):
+        # rows are kept as dictionaries, which are much cheaper to create than Series of iterrows
+        rows = self.words.words[mask].to_dict("records")
+        self.shown_rows.extend(zip(rows, previous_session_mask[mask].tolist()))
     
     def __update_bp(self):
         self.bp.set_certain_qty(self.words.number_of_known_words() * 4 + self.words.number_of_learning_words() * 1)
@@ -302,5 +303,6 @@ class WordListMenu(ft.Column):
         
     def change_height(self, height):
         self.container.height = height
+        self.lv.set_viewport_height(height - 20) # minus padding of the container
         self.update()
     
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Benchmark of AppData hot paths on synthetic sets.
+
+Sets of words and definitions with random progress are generated in a temporary data directory,
+then load_set, save_set, AppData.__init__, draw_index_group, answers and the number_of_* counters
+are timed. Results are printed (or written with --output) as JSON, so runs can be compared.
+
+Usage:
+    python benchmarks/benchmark_app_data.py [--sizes 40 1000 10000 100000] [--repeat 5] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# the data directory must be set before the modules of the app are imported
+os.environ["FLET_APP_STORAGE_DATA"] = tempfile.mkdtemp(prefix="learning_app_benchmark_")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from constants import PartsOfSpeech, WordDefinitions, StatsColumns
+from StorageBackend import StorageBackend
+from SetCache import SetCache
+from FilePathManager import FilePathManager
+from AppData import AppData, load_set, save_set, add_new_file
+
+DEFAULT_SIZES = [40, 1_000, 10_000, 100_000]
+KINDS = ["words", "definitions"]
+ANSWERS = 200 # answers timed for every set
+
+
+def generate_set(kind: str, rows: int, seed: int = 0) -> pd.DataFrame:
+    # Returns a set with random texts and random (consistent) progress.
+    rng = np.random.default_rng(seed)
+    if kind == "words":
+        data = {col.value: [f"{col.value}_{i}" for i in range(rows)] for col in PartsOfSpeech}
+        # like in real sets, some parts of speech are empty
+        for col in [PartsOfSpeech.ADJECTIVE.value, PartsOfSpeech.ADVERB.value]:
+            data[col] = [value if i % 3 else None for i, value in enumerate(data[col])]
+    else:
+        data = {
+            WordDefinitions.DEFINITION.value: [f"definition of the word number {i}" for i in range(rows)],
+            WordDefinitions.WORD.value: [f"word_{i}" for i in range(rows)]
+        }
+
+    # codes 0/0/0, 0/0/1, 1/0/0, 1/0/1, 1/1/0 and 1/1/1
+    codes = rng.choice([0, 1, 4, 5, 6, 7], size=rows)
+    data[StatsColumns.CORRECT_ANSWERS.value] = rng.integers(0, 10, size=rows)
+    data[StatsColumns.GOOD_ANSWERS_IN_A_ROW.value] = (codes & 2) > 0
+    data[StatsColumns.GOOD_ANSWER.value] = (codes & 4) > 0
+    data[StatsColumns.WORD_TO_LEARN.value] = (codes & 1) > 0
+    return pd.DataFrame(data)
+
+
+def measure(function, repeat: int) -> list:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def result(kind: str, rows: int, operation: str, times: list) -> dict:
+    return {
+        "kind": kind,
+        "rows": rows,
+        "operation": operation,
+        "runs": len(times),
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "max_s": max(times)
+    }
+
+
+def benchmark_set(kind: str, rows: int, repeat: int) -> list:
+    file_name = f"benchmark{rows}_{kind}.csv"
+    data = generate_set(kind, rows)
+    add_new_file(file_name, f"Benchmark {rows} {kind}")
+    results = []
+
+    results.append(result(kind, rows, "save_set", measure(lambda: save_set(data, file_name), repeat)))
+
+    def load_cold():
+        SetCache.invalidate(FilePathManager.get_csv_path(file_name))
+        load_set(file_name)
+    results.append(result(kind, rows, "load_set_cold", measure(load_cold, repeat)))
+    results.append(result(kind, rows, "load_set_cached", measure(lambda: load_set(file_name), repeat)))
+
+    results.append(result(kind, rows, "AppData.__init__", measure(lambda: AppData(file_name), repeat)))
+
+    app_data = AppData(file_name)
+    results.append(result(kind, rows, "draw_index_group", measure(app_data.draw_index_group, repeat)))
+
+    # good and bad answers alternate on drawn rows, like in a learning session
+    answers = {
+        "good_answer_at_current_row": (app_data.good_answer_at_current_row, []),
+        "bad_answer_at_current_row": (app_data.bad_answer_at_current_row, [])
+    }
+    for i in range(ANSWERS):
+        if not app_data.it_is_not_last_index_of_group() and app_data.draw_index_group() == 0:
+            break
+        app_data.draw_new_row()
+        answer, times = list(answers.values())[i % 2]
+        start = time.perf_counter()
+        answer()
+        times.append(time.perf_counter() - start)
+    for operation, (_, times) in answers.items():
+        if times:
+            results.append(result(kind, rows, operation, times))
+    results.append(result(kind, rows, "flush", measure(app_data.flush, 1)))
+
+    for counter in ["number_of_known_words", "number_of_learning_words", "number_of_all_words"]:
+        results.append(result(kind, rows, counter, measure(getattr(app_data, counter), repeat)))
+
+    StorageBackend.get_active().delete_set(file_name)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of AppData hot paths on synthetic sets.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="numbers of rows of generated sets")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs of every operation")
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default="csv", help="storage backend")
+    parser.add_argument("--output", help="path of the JSON file with results (printed if not given)")
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        from SqliteStorageBackend import SqliteStorageBackend
+        StorageBackend.set_active(SqliteStorageBackend())
+
+    results = []
+    for rows in args.sizes:
+        for kind in KINDS:
+            results.extend(benchmark_set(kind, rows, args.repeat))
+    AppData.flush_all()
+    shutil.rmtree(os.environ["FLET_APP_STORAGE_DATA"], ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "repeat": args.repeat,
+            "answers": ANSWERS
+        },
+        "results": results
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
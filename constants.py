@@ -21,6 +21,15 @@ class FilesColumns(Enum):
     FILE_NAME = "file_name"
     TITLE = "title"
     SUBTITLE = "subtitle"
+    # summary of the set cached in the registry, it is updated by the app
+    KIND = "kind"
+    ROWS = "rows"
+    KNOWN = "known"
+    LEARNING = "learning"
+    TO_LEARN = "to_learn"
+    LAST_STUDIED = "last_studied"
+    SIZE = "size"
+    MTIME = "mtime"
 
 class Warnings(Enum):
     UNNECESSARY_COLUMNS = "Unnecessary columns found."
@@ -37,13 +46,53 @@ class Warnings(Enum):
 # constant value form maximum number of rows in set
 MAX_ROWS = 40
 
+# maximum number of rows in set when large sets are enabled in the settings
+MAX_ROWS_LARGE_SETS = 100_000
+
+# number of items rendered at once in lists of items (the next ones are shown on demand)
+LIST_PAGE_SIZE = 50
+
+# number of items built above and below the visible part of virtualized lists
+VIRTUAL_LIST_OVERSCAN = 5
+
+# number of wrapped texts kept in each cache of TextLayout
+TEXT_LAYOUT_CACHE_SIZE = 16_384
+
+# pause of typing in seconds after which the search of sets starts
+SEARCH_DEBOUNCE_SECONDS = 0.15
+
+# duration in milliseconds of scrolling to a set found by the search
+SEARCH_SCROLL_DURATION = 300
+
+# maximum number of cards shown by the search in cards of all sets
+CARD_SEARCH_LIMIT = 50
+
+# storage of learning sets: "csv" (one CSV file per set and files.csv) or "sqlite" (one database)
+STORAGE_BACKEND = "csv"
+
+# imported files larger than this size in bytes are read and written in chunks of IMPORT_CHUNK_ROWS rows
+IMPORT_CHUNKED_MIN_BYTES = 4 * 1024 * 1024
+IMPORT_CHUNK_ROWS = 10_000
+
+# progress of exports is shown for set files larger than this size in bytes
+EXPORT_PROGRESS_MIN_BYTES = 4 * 1024 * 1024
+
+# memory budget in bytes of the cache with parsed sets
+SET_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# validation results of set files are also checked against a hash of the content (costs a read of every saved file)
+VALIDATION_CACHE_CONTENT_HASH = False
+
+# size in bytes after which the answer journal is folded back into the set file
+MAX_JOURNAL_SIZE = 16 * 1024
+
 class Errors(Enum):
     NOT_A_CSV = "File is not a CSV."
     ERROR_LOADING_FILE = "Error loading file with pandas."
     FILE_NOT_FOUND = "File not found."
     MISSING_COLUMNS_WORDS = "Missing required columns for words file."
     MISSING_COLUMNS_DEFINITIONS = "Missing required columns for definitions file."
-    TOO_MANY_ROWS = f"File contains more than {MAX_ROWS} rows."
+    TOO_MANY_ROWS = "File contains more than {} rows." # formatted with the current limit
     EMPTY_VALUES_IN_DEFINITIONS = "All rows have empty values in typical columns for definitions file."
     INSUFFICIENT_NON_EMPTY_VALUES_IN_WORDS = "All rows have insufficient non-empty values in typical columns for words file."
     NO_MATCHING_COLUMN_PATTERN = "File does not match any expected column patterns."
@@ -1,3 +1,4 @@
+import multiprocessing
 import flet as ft
 from TilesContainer import TilesContainer
 from CreateSetMenu import CreateSetMenu
@@ -10,6 +11,8 @@ from BaseWordField import BaseWordField # need in on_resized in isinstance
 from EditSetMenu import EditSetMenu # need in on_resized in isinstance
 from ImportExportControl import ImportExportControl # check if it is instance of ImportExportControl in logic of search button
 from FilePathManager import FilePathManager
+from AppData import AppData
+from SetLimits import SetLimits
 # dictionary with colors
 colors = {
     "floating_action_button_bg": ft.Colors.TEAL_800,
@@ -60,6 +63,7 @@ def main(page: ft.Page):
     
     PageProperties.set_slider_and_bgcolor_values_from_page(page)
     PageProperties.set_theme_from_page(page)
+    SetLimits.set_large_sets_from_page(page)
 
     page.title = "Leaning App"
     
@@ -95,6 +99,9 @@ def main(page: ft.Page):
         PageProperties.set_width_height_from_page(e.page)
         
     page.on_resized = resize_page
+    
+    # save answers which are still only in the journals when the session is closed
+    page.on_disconnect = lambda e: AppData.flush_all()
 
     def on_search_click(e):
         # Logic for search button
@@ -148,4 +155,7 @@ def main(page: ft.Page):
 
     page.add(body)
 
-ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    # processes of the bulk import start from this module, they must not start the app
+    multiprocessing.freeze_support()
+    ft.app(target=main)